@@ -0,0 +1,171 @@
+# analysis_cache.py
+# Position analysis cache shared by every worker and session.
+#
+# Positions are keyed canonically: columns and freecells are sorted, so positions that
+# differ only in which column or freecell holds what share one entry. Only cache values
+# that don't depend on column/freecell numbering (scores, move counts, solvability, ...).
+#
+# Two tiers: a small in-process LRU, then a SQLite database in WAL mode that all gunicorn
+# workers read and write concurrently. A background thread in each process trims the
+# database (least recently used first, in small batches) whenever it grows past
+# ANALYSIS_CACHE_MAX_BYTES, so requests never wait on a big DELETE.
+import os
+import json
+import time
+import sqlite3
+import hashlib
+import threading
+from collections import OrderedDict
+import cards
+
+ANALYSIS_CACHE_FILE = os.environ.get("ANALYSIS_CACHE_FILE", "analysis_cache.sqlite3")
+ANALYSIS_CACHE_MAX_BYTES = int(os.environ.get("ANALYSIS_CACHE_MAX_BYTES", 256 * 1024 * 1024))
+LRU_SIZE = 4096
+EVICT_CHECK_EVERY = 512     # writes between size checks
+EVICT_CHECK_SECONDS = 60    # also check this often, to pick up other workers' writes
+EVICT_TARGET = 0.9          # trim down to this share of max_bytes
+EVICT_BATCH = 500           # rows deleted per statement
+EVICT_PAUSE_SECONDS = 0.01  # between batches, so other requests and workers get a turn
+TOUCH_AFTER_SECONDS = 300   # refresh last_used on a hit at most this often
+
+
+def position_key(state):
+    """16-byte canonical key for a position (column and freecell order ignored)."""
+    columns = sorted(bytes(cards.card_code(c) for c in col) for col in state['tableau'])
+    freecells = sorted(cards.card_code(c) for c in state['freecells'] if c is not None)
+    foundations = bytes(len(state['foundations'][suit]) for suit in cards.SUITS)
+    kings_only = b'K' if state.get('kings_only_on_empty_tableau') else b'-'
+    raw = kings_only + foundations + bytes(freecells) + b'|' + b'|'.join(columns)
+    return hashlib.blake2b(raw, digest_size=16).digest()
+
+
+class AnalysisCache:
+    def __init__(self, path=ANALYSIS_CACHE_FILE, max_bytes=ANALYSIS_CACHE_MAX_BYTES, lru_size=LRU_SIZE):
+        self.path = path
+        self.max_bytes = max_bytes
+        self.lru_size = lru_size
+        self._lru = OrderedDict()
+        self._lock = threading.Lock()
+        self._conn = None
+        self._conn_pid = None
+        self._writes = 0
+        self._trim_wanted = None
+        self._trimmer_pid = None
+
+    def _connect(self):
+        conn = sqlite3.connect(self.path, timeout=5.0, check_same_thread=False, isolation_level=None)
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute("PRAGMA synchronous=NORMAL")
+        conn.execute(
+            "CREATE TABLE IF NOT EXISTS analysis ("
+            " kind TEXT NOT NULL, key BLOB NOT NULL, value TEXT NOT NULL, last_used REAL NOT NULL,"
+            " PRIMARY KEY (kind, key))"
+        )
+        conn.execute("CREATE INDEX IF NOT EXISTS analysis_last_used ON analysis (last_used)")
+        return conn
+
+    def _db(self):
+        # One connection per process, opened after any fork
+        if self._conn is None or self._conn_pid != os.getpid():
+            self._conn = self._connect()
+            self._conn_pid = os.getpid()
+            self._lru.clear()
+            self._start_trimmer()
+        return self._conn
+
+    def _remember(self, lru_key, value):
+        self._lru[lru_key] = value
+        self._lru.move_to_end(lru_key)
+        if len(self._lru) > self.lru_size:
+            self._lru.popitem(last=False)
+
+    def get(self, kind, key):
+        """Cached value or None."""
+        lru_key = (kind, key)
+        with self._lock:
+            if lru_key in self._lru:
+                self._lru.move_to_end(lru_key)
+                return self._lru[lru_key]
+            try:
+                row = self._db().execute(
+                    "SELECT value, last_used FROM analysis WHERE kind = ? AND key = ?", (kind, key)
+                ).fetchone()
+                if row is None:
+                    return None
+                now = time.time()
+                if now - row[1] > TOUCH_AFTER_SECONDS:
+                    self._db().execute(
+                        "UPDATE analysis SET last_used = ? WHERE kind = ? AND key = ?", (now, kind, key)
+                    )
+            except sqlite3.Error:
+                return None  # The cache is an optimization; never fail the request over it
+            value = json.loads(row[0])
+            self._remember(lru_key, value)
+            return value
+
+    def put(self, kind, key, value):
+        with self._lock:
+            self._remember((kind, key), value)
+            try:
+                self._db().execute(
+                    "INSERT OR REPLACE INTO analysis (kind, key, value, last_used) VALUES (?, ?, ?, ?)",
+                    (kind, key, json.dumps(value, separators=(',', ':')), time.time())
+                )
+                self._writes += 1
+                if self._writes % EVICT_CHECK_EVERY == 0:
+                    self._trim_wanted.set()
+            except sqlite3.Error:
+                pass
+
+    def _start_trimmer(self):
+        if self._trimmer_pid == os.getpid():
+            return
+        self._trimmer_pid = os.getpid()
+        self._trim_wanted = threading.Event()
+        threading.Thread(target=self._trim_loop, daemon=True).start()
+
+    def _trim_loop(self):
+        conn = None
+        while True:
+            self._trim_wanted.wait(EVICT_CHECK_SECONDS)
+            self._trim_wanted.clear()
+            try:
+                conn = conn or self._connect()
+                self.trim(conn)
+            except sqlite3.Error:
+                pass  # Try again at the next check
+
+    def trim(self, conn):
+        """Delete least recently used rows in batches until the live data is under EVICT_TARGET * max_bytes."""
+        page_size = conn.execute("PRAGMA page_size").fetchone()[0]
+        if self._live_bytes(conn, page_size) <= self.max_bytes:
+            return 0
+        deleted = 0
+        while self._live_bytes(conn, page_size) > self.max_bytes * EVICT_TARGET:
+            cursor = conn.execute(
+                "DELETE FROM analysis WHERE rowid IN (SELECT rowid FROM analysis ORDER BY last_used LIMIT ?)",
+                (EVICT_BATCH,)
+            )
+            if cursor.rowcount <= 0:
+                break
+            deleted += cursor.rowcount
+            time.sleep(EVICT_PAUSE_SECONDS)
+        return deleted
+
+    @staticmethod
+    def _live_bytes(conn, page_size):
+        pages = conn.execute("PRAGMA page_count").fetchone()[0]
+        free_pages = conn.execute("PRAGMA freelist_count").fetchone()[0]
+        return (pages - free_pages) * page_size
+
+    def get_or_compute(self, kind, state, compute):
+        """Return the cached analysis of kind for state, computing and storing it on a miss."""
+        key = position_key(state)
+        value = self.get(kind, key)
+        if value is None:
+            value = compute(state)
+            self.put(kind, key, value)
+        return value
+
+
+cache = AnalysisCache()
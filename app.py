@@ -1,9 +1,8 @@
 # app.py
-from flask import Flask, request, jsonify, session, send_from_directory
+from flask import Flask, request, jsonify, session, send_from_directory, Response, stream_with_context
 from flask_cors import CORS
-import cards, game_logic, utils
-import random
-import copy
+import cards, game_logic, utils, telemetry, par, push, daily, timeline, seed_index, evaluate, analysis_cache, profiler
+import hmac
 import uuid
 import sys
 import json
@@ -51,33 +50,33 @@ def add_high_score(moves, runtime,seed):
     scores = scores[:MAX_HIGH_SCORES]
     save_high_scores(scores)
 
+def game_runtime(state):
+    # Seconds since the game started, or None if the start time is unknown
+    if 'start_time' not in state:
+        return None
+    started = datetime.fromisoformat(state['start_time'])
+    if started.tzinfo is None:
+        started = started.replace(tzinfo=timezone.utc)
+    now = datetime.now(timezone.utc)
+    return (now - started).total_seconds()
+
 
-def create_new_game(seed=None, kings_only_on_empty_tableau=False):
-    deck = [cards.Card(rank, suit) for suit in cards.SUITS for rank in cards.RANKS]
-    # Only set seed if valid
-    if seed is not None and str(seed).lower() != 'none' and str(seed).strip() != "":
-        # Optionally: cast to int if you only want integer seeds
-        try:
-            random.seed(int(seed))
-        except (ValueError, TypeError):
-            random.seed(str(seed))
-    random.shuffle(deck)
-    tableau = [[] for _ in range(8)]
-    for i, card in enumerate(deck):
-        tableau[i % 8].append(card)
+def create_new_game(seed=None, kings_only_on_empty_tableau=False, tableau=None):
+    if tableau is None:
+        tableau = game_logic.deal_tableau(seed)
     freecells = [None] * 4
     foundations = {suit: [] for suit in cards.SUITS}
-    history = []
-    return {
+    state = {
         'tableau': tableau,
         'freecells': freecells,
         'foundations': foundations,
-        'history': history,
         'seed': seed,
         'kings_only_on_empty_tableau': kings_only_on_empty_tableau,
         'start_time': datetime.now(timezone.utc).isoformat().replace('+00:00', 'Z'),
         'move_count': 0
     }
+    state['timeline'] = timeline.Timeline(state)
+    return state
 
 def create_test_game():
     tableau = [
@@ -103,15 +102,15 @@ def create_test_game():
         'C': [],
         'S': [cards.Card('A', 'S'), cards.Card('2', 'S')]
     }
-    history = []
-    return {
+    state = {
         'tableau': tableau,
         'freecells': freecells,
         'foundations': foundations,
-        'history': history,
         'seed': 'test',
         'kings_only_on_empty_tableau': False
     }
+    state['timeline'] = timeline.Timeline(state)
+    return state
 
 def serialize_card(card):
     if card is None:
@@ -128,27 +127,22 @@ def serialize_state(state):
         'seed': state.get('seed'),
         'kings_only_on_empty_tableau': state.get('kings_only_on_empty_tableau', False),
         'move_count': state.get('move_count', 0),
-        'start_time': state.get('start_time')
-    }
-
-def deep_copy_game(state):
-    return {
-        'tableau': copy.deepcopy(state['tableau']),
-        'freecells': copy.deepcopy(state['freecells']),
-        'foundations': copy.deepcopy(state['foundations']),
-        'history': copy.deepcopy(state['history']),
-        'seed': state.get('seed'),
-        'kings_only_on_empty_tableau': state.get('kings_only_on_empty_tableau', False)
+        'start_time': state.get('start_time'),
+        'version': state.get('version', 0),
+        'daily': state.get('daily'),
+        'par': par.get_par(state.get('seed')),
+        'history_position': state['timeline'].position,
+        'history_length': state['timeline'].length
     }
 
-def deep_copy_game_for_history(state):
-    return {
-        'tableau': copy.deepcopy(state['tableau']),
-        'freecells': copy.deepcopy(state['freecells']),
-        'foundations': copy.deepcopy(state['foundations']),
-        'seed': state.get('seed'),
-        'kings_only_on_empty_tableau': state.get('kings_only_on_empty_tableau', False)
-    }
+def serialize_steps(steps):
+    # [((type, idx), (type, idx)), ...] -> the {from, to} steps the animation plays
+    if steps is None:
+        return None
+    return [
+        {'from': {'type': src[0], 'idx': src[1]}, 'to': {'type': dst[0], 'idx': dst[1]}}
+        for src, dst in steps
+    ]
 
 @app.before_request
 def ensure_session_id():
@@ -167,10 +161,43 @@ def save_game_state(state):
     sid = session['session_id']
     games[sid] = state
 
+def notify_state(state):
+    # Bump the state version and push the change to every tab of this session
+    state['version'] = state.get('version', 0) + 1
+    push.broker.publish_state(session['session_id'], serialize_state(state))
+
 
 @app.route('/high-scores', methods=['GET'])
 def get_high_scores():
-    return jsonify(load_high_scores())
+    scores = load_high_scores()
+    pars = par.cached_pars()
+    for entry in scores:
+        entry['par'] = par.get_par(entry.get('seed'), pars)
+    return jsonify(scores)
+
+@app.route('/seeds', methods=['GET'])
+def find_seeds():
+    # e.g. /seeds?query=ace_depth_max<=2,kings_buried_max_column>=2&limit=20
+    try:
+        limit = int(request.args.get('limit', 100))
+        offset = int(request.args.get('offset', 0))
+    except ValueError:
+        return jsonify({'error': 'limit and offset must be integers'}), 400
+    if limit < 0 or offset < 0:
+        return jsonify({'error': 'limit and offset must not be negative'}), 400
+    limit = min(max(limit, 1), 1000)
+    try:
+        result = seed_index.query_seeds(request.args.get('query', ''), limit=limit, offset=offset)
+    except ValueError as e:
+        return jsonify({'error': str(e), 'fields': list(seed_index.FIELDS)}), 400
+    return jsonify(result)
+
+@app.route('/seeds/<int:seed>', methods=['GET'])
+def seed_features(seed):
+    features = seed_index.seed_features(seed)
+    if features is None:
+        return jsonify({'error': 'Seed must be between 1 and 32000'}), 400
+    return jsonify(features)
 
 @app.route('/clear-high-scores', methods=['POST'])
 def clear_high_scores():
@@ -200,17 +227,49 @@ def new_game():
 
     state = create_new_game(seed, kings_only_on_empty_tableau=kings_only)
     save_game_state(state)
+    notify_state(state)
+    telemetry.record(telemetry.EVENT_START, session['session_id'], seed)
     return jsonify({
         'message': 'New game started',
         'seed': seed,
+        'par': par.get_par(seed),
         'state': serialize_state(state)
     }), 200
 
+@app.route('/daily', methods=['POST'])
+def new_daily_game():
+    if TEST_MODE:
+        return jsonify({'error': 'Cannot start new game in test mode.'}), 400
+
+    # Every session gets a copy of the same shared deal
+    challenge = daily.get_challenge()
+    state = create_new_game(challenge.seed, tableau=challenge.deal())
+    state['daily'] = challenge.day
+    save_game_state(state)
+    notify_state(state)
+    telemetry.record(telemetry.EVENT_START, session['session_id'], challenge.seed)
+    return jsonify({
+        'message': 'Daily challenge started',
+        'seed': challenge.seed,
+        'daily': challenge.day,
+        'par': challenge.par,
+        'state': serialize_state(state)
+    }), 200
+
+@app.route('/daily/leaderboard', methods=['GET'])
+def daily_leaderboard():
+    challenge = daily.get_challenge()
+    board = challenge.leaderboard()
+    board['your_rank'] = challenge.rank(session['session_id'])
+    return jsonify(board)
+
 @app.route('/cancel', methods=['POST'])
 def cancel_game():
     sid = session.get('session_id')
     if sid and sid in games:
-        del games[sid]
+        state = games.pop(sid)
+        telemetry.record(telemetry.EVENT_CANCEL, sid, state.get('seed'), state.get('move_count', 0))
+        push.broker.publish_game_over(sid, 'cancel')
     # Respond as “no game in progress”
     return jsonify({'message': 'Game cancelled.'}), 200
 
@@ -218,7 +277,11 @@ def cancel_game():
 def game_won():
     sid = session.get('session_id')
     if sid and sid in games:
-        del games[sid]
+        state = games.pop(sid)
+        if state.get('game_over'):
+            telemetry.record(telemetry.EVENT_WIN, sid, state.get('seed'),
+                             state.get('move_count', 0), state.get('win_runtime'))
+        push.broker.publish_game_over(sid, 'ended')
     # Respond as “no game in progress”
     return jsonify({'message': 'Game won!'}), 200
 
@@ -229,6 +292,59 @@ def get_state():
         return jsonify({'error': 'No game in progress'}), 400
     return jsonify(serialize_state(state))
 
+def analyze_position(state):
+    # Everything here is independent of column/freecell numbering, so it can be cached canonically
+    encoded = evaluate.encode_states([state])
+    features = evaluate.features(*encoded)
+    moves = par.legal_moves(game_logic.copy_board(state))
+    return {
+        'score': float(evaluate.evaluate(*encoded)[0]),
+        'legal_moves': len(moves),
+        'dead_end': not moves,
+        'features': {name: int(values[0]) for name, values in features.items() if values.ndim == 1},
+    }
+
+@app.route('/analysis', methods=['GET'])
+def analysis():
+    state = get_game_state()
+    if not state:
+        return jsonify({'error': 'No game in progress'}), 400
+    return jsonify(analysis_cache.cache.get_or_compute('position', state, analyze_position))
+
+@app.route('/events', methods=['GET'])
+def events():
+    # Server-Sent Events stream; starts with the full state, then patches
+    sid = session['session_id']
+    state = games.get(sid)
+    initial = serialize_state(state) if state else None
+    return Response(
+        stream_with_context(push.broker.stream(sid, initial)),
+        mimetype='text/event-stream',
+        headers={'Cache-Control': 'no-cache', 'X-Accel-Buffering': 'no'}
+    )
+
+@app.route('/debug/profile', methods=['GET'])
+def debug_profile():
+    # Admin only: samples this worker's stacks for ?seconds=N, returns collapsed stacks
+    if not profiler.ADMIN_TOKEN:
+        return jsonify({'error': 'Not found'}), 404
+    # Header only: a query-string token would end up in access logs
+    token = request.headers.get('X-Admin-Token', '')
+    if not hmac.compare_digest(token.encode(), profiler.ADMIN_TOKEN.encode()):
+        return jsonify({'error': 'Forbidden'}), 403
+    try:
+        seconds = float(request.args.get('seconds', 5))
+    except ValueError:
+        return jsonify({'error': 'seconds must be a number'}), 400
+    if not 0 < seconds <= profiler.MAX_SECONDS:
+        return jsonify({'error': f'seconds must be between 0 and {profiler.MAX_SECONDS}'}), 400
+
+    handlers = frozenset(view.__code__ for view in app.view_functions.values() if hasattr(view, '__code__'))
+    counts = profiler.sample(seconds, handlers)
+    if counts is None:
+        return jsonify({'error': 'A profile is already running'}), 409
+    return Response(profiler.format_collapsed(counts), mimetype='text/plain')
+
 @app.route('/move', methods=['POST'])
 def move():
     state = get_game_state()
@@ -252,19 +368,25 @@ def move():
     if source_type is None or dest_type is None:
         return jsonify({'error': 'Invalid source or destination'}), 400
 
-    # Save undo state before mutation
-    state['history'].append(deep_copy_game_for_history(state))
-    print("Undo history length:", len(state['history']))
+    success, reason = game_logic.dispatch_move(
+        state, num, source_type, source_idx, dest_type, dest_idx, validate_only=True
+    )
+    if not success:
+        return jsonify({'error': reason}), 400
 
+    # Plan the single-card steps against the board as it is before the move
+    steps = game_logic.move_steps(state, num, source_type, source_idx, dest_type, dest_idx)
     success, reason = game_logic.dispatch_move(
         state, num, source_type, source_idx, dest_type, dest_idx, validate_only=False
     )
 
     if not success:
-        state['history'].pop()
         return jsonify({'error': reason}), 400
-    
+
+    # Record the move for undo/redo/seek
+    state['timeline'].record((num, source, dest), state)
     state['move_count'] = state.get('move_count', 0) + 1
+    telemetry.record(telemetry.EVENT_MOVE, session['session_id'], state.get('seed'), state['move_count'])
 
     # Set auto-move trigger only if not pulling a card from a foundation
     state['last_action_was_manual_move'] = (source_type != 'foundation')
@@ -273,21 +395,30 @@ def move():
     if game_logic.check_win(state['foundations']):
         state['game_over'] = True
         # Calculate runtime in seconds
-        if 'start_time' in state:
-            started = datetime.fromisoformat(state['start_time'])
-            if started.tzinfo is None:
-                started = started.replace(tzinfo=timezone.utc)
-            now = datetime.now(timezone.utc)
-            runtime = (now - started).total_seconds()
+        runtime = game_runtime(state)
+        state['win_runtime'] = runtime  # /game-won records this, not the later round-trip time
+
+        daily_rank = None
+        if state.get('daily'):
+            # Daily results go to the in-memory leaderboard, not high_scores.json
+            daily_rank = daily.get_challenge(state['daily']).submit(
+                session['session_id'], state.get('move_count', 0), runtime
+            )
         else:
-            runtime = None  # fallback
-
-        add_high_score(
-            moves=state.get('move_count', 0),
-            runtime=runtime,
-            seed=state.get('seed')
-        )
-        return jsonify({'message': 'You won!', 'state': serialize_state(state), 'runtime': runtime})
+            add_high_score(
+                moves=state.get('move_count', 0),
+                runtime=runtime,
+                seed=state.get('seed')
+            )
+        # Any winning line is an upper bound for par; the batch optimizer tightens it offline
+        if isinstance(state.get('seed'), int) and not state.get('kings_only_on_empty_tableau'):
+            par.record_par(state['seed'], state['move_count'])
+            par.save_replay(state['seed'], state['timeline'].played_moves())
+        notify_state(state)
+        push.broker.publish(session['session_id'], 'won', {'runtime': runtime, 'daily_rank': daily_rank})
+        push.broker.publish(session['session_id'], 'high-scores', {})
+        return jsonify({'message': 'You won!', 'state': serialize_state(state), 'runtime': runtime,
+                        'daily_rank': daily_rank, 'steps': serialize_steps(steps)})
 
 
     # Attempt auto-moves
@@ -298,7 +429,8 @@ def move():
             return jsonify({'message': 'You won!', 'state': serialize_state(state), 'runtime': runtime})
 
     save_game_state(state)
-    return jsonify({'message': 'Move successful', 'state': serialize_state(state)})
+    notify_state(state)
+    return jsonify({'message': 'Move successful', 'state': serialize_state(state), 'steps': serialize_steps(steps)})
 
 @app.route('/validate-move', methods=['POST'])
 def validate_move():
@@ -316,16 +448,16 @@ def validate_move():
     if source_type is None or dest_type is None:
         return jsonify({'valid': False, 'error': 'Invalid source or destination'}), 400
 
-    # Use a deepcopy so we never mutate the real state during validation
-    import copy
-    state_copy = copy.deepcopy(state)
+    # Use a copy so we never mutate the real state during validation
+    state_copy = game_logic.copy_board(state)
 
     success, reason = game_logic.dispatch_move(
         state_copy, num, source_type, source_idx, dest_type, dest_idx, validate_only=True
     )
 
     if success:
-        return jsonify({'valid': True}), 200
+        steps = game_logic.move_steps(state, num, source_type, source_idx, dest_type, dest_idx)
+        return jsonify({'valid': True, 'steps': serialize_steps(steps)}), 200
     else:
         return jsonify({'valid': False, 'error': reason}), 400
 
@@ -338,20 +470,61 @@ def undo():
     if state.get('game_over'):
         return jsonify({'error': 'Game is over. Start a new game!'}), 400
 
-    if not state['history']:
+    history = state['timeline']
+    if history.position == 0:
         return jsonify({'error': 'No moves to undo'}), 400
 
-    prev = state['history'].pop()
-    # Restore each field, keep the same history/seed
-    state['tableau'] = prev['tableau']
-    state['freecells'] = prev['freecells']
-    state['foundations'] = prev['foundations']
-    state['seed'] = prev['seed']
-    state['kings_only_on_empty_tableau'] = prev.get('kings_only_on_empty_tableau', False)
+    success, reason = history.seek(state, history.position - 1)
+    if not success:
+        return jsonify({'error': reason}), 400
     save_game_state(state)
-    print("Undo performed, history length now:", len(state['history']))
+    notify_state(state)
+    telemetry.record(telemetry.EVENT_UNDO, session['session_id'], state.get('seed'), state.get('move_count', 0))
     return jsonify({'message': 'Undo successful', 'state': serialize_state(state)})
 
+@app.route('/redo', methods=['POST'])
+def redo():
+    state = get_game_state()
+    if not state:
+        return jsonify({'error': 'No game in progress'}), 400
+
+    if state.get('game_over'):
+        return jsonify({'error': 'Game is over. Start a new game!'}), 400
+
+    success, reason = state['timeline'].redo(state)
+    if not success:
+        return jsonify({'error': reason}), 400
+    # A redone move counts like any other move
+    state['move_count'] = state.get('move_count', 0) + 1
+    save_game_state(state)
+    notify_state(state)
+    return jsonify({'message': 'Redo successful', 'state': serialize_state(state)})
+
+@app.route('/seek', methods=['POST'])
+def seek():
+    state = get_game_state()
+    if not state:
+        return jsonify({'error': 'No game in progress'}), 400
+
+    if state.get('game_over'):
+        return jsonify({'error': 'Game is over. Start a new game!'}), 400
+
+    try:
+        target = int(request.args.get('move'))
+    except (ValueError, TypeError):
+        return jsonify({'error': 'move must be an integer'}), 400
+
+    history = state['timeline']
+    start = history.position
+    success, reason = history.seek(state, target)
+    if not success:
+        return jsonify({'error': reason}), 400
+    # Jumping forward replays moves (counted like redos); jumping back is like undo
+    state['move_count'] = state.get('move_count', 0) + max(0, target - start)
+    save_game_state(state)
+    notify_state(state)
+    return jsonify({'message': f'Jumped to move {target}', 'state': serialize_state(state)})
+
 @app.route('/')
 def index():
     return app.send_static_file('index.html')
@@ -1,8 +1,3 @@
-from colorama import Fore, Style, init
-
-# Initialize colorama
-init(autoreset=True)
-
 SUITS = ['S', 'H', 'D', 'C']
 RANKS = ['A', '2', '3', '4', '5', '6', '7', '8', '9', '10', 'J', 'Q', 'K']
 suits_symbols = {'S': '♠', 'H': '♥', 'D': '♦', 'C': '♣'}
@@ -16,10 +11,29 @@ class Card:
     def __str__(self):
         return f"{self.rank}{self.suit}"
 
+# Card table: one shared Card per code (position in a suit-major deck), reused by every deal
+DECK = tuple(Card(rank, suit) for suit in SUITS for rank in RANKS)
+CARD_CODES = {(card.rank, card.suit): code for code, card in enumerate(DECK)}
+
+def card_code(card):
+    return CARD_CODES[(card.rank, card.suit)]
+
 def card_color(card):
     return 'red' if card.suit in ['H', 'D'] else 'black'
 
+_colorama = None
+
+def _color_codes():
+    # colorama is only needed by the CLI, so import and initialize it on first use
+    global _colorama
+    if _colorama is None:
+        import colorama
+        colorama.init(autoreset=True)
+        _colorama = colorama
+    return _colorama.Fore, _colorama.Style
+
 def colored_suit(card):
+    Fore, Style = _color_codes()
     if card.suit in ['H', 'D']:
         color = Fore.RED
     else:
@@ -0,0 +1,101 @@
+# daily.py
+# Daily challenge: one seed per day shared by every player, with a live leaderboard.
+import hashlib
+import threading
+from datetime import datetime, timezone
+from sortedcontainers import SortedList
+import game_logic, tables, par
+
+LEADERBOARD_SIZE = 20
+KEEP_DAYS = 2  # today plus yesterday, so games started before midnight can still finish
+
+
+def today():
+    return datetime.now(timezone.utc).date().isoformat()
+
+
+def challenge_seed(day):
+    digest = hashlib.sha256(f"freecell-daily-{day}".encode()).digest()
+    return int.from_bytes(digest[:4], 'big') % tables.NUM_SEEDS + 1
+
+
+class Challenge:
+    """The immutable deal for one day plus its leaderboard.
+
+    The layout is dealt once and every session on this challenge copies its columns,
+    so the deal is computed once per day, not per game.
+    """
+
+    def __init__(self, day):
+        self.day = day
+        self.seed = challenge_seed(day)
+        self.layout = tuple(tuple(col) for col in game_logic.deal_tableau(self.seed))
+        self._lock = threading.Lock()
+        # Entries sort by (moves, runtime, finish order); inserts and rank lookups are O(log n)
+        self._ranking = SortedList()
+        self._best = {}  # session id -> its entry in _ranking
+        self._finished = 0
+
+    @property
+    def par(self):
+        # Read on use: pars can improve during the day (par.get_par is an in-memory lookup)
+        return par.get_par(self.seed)
+
+    def deal(self):
+        return [list(col) for col in self.layout]
+
+    def submit(self, sid, moves, runtime):
+        """Record a win; keeps each session's best result. Returns the session's 1-based rank."""
+        runtime = runtime if runtime is not None else float('inf')
+        with self._lock:
+            self._finished += 1
+            entry = (moves, runtime, self._finished, sid)
+            old = self._best.get(sid)
+            if old is not None:
+                if old[:2] <= entry[:2]:
+                    return self._ranking.index(old) + 1
+                self._ranking.remove(old)
+            self._ranking.add(entry)
+            self._best[sid] = entry
+            return self._ranking.index(entry) + 1
+
+    def rank(self, sid):
+        with self._lock:
+            entry = self._best.get(sid)
+            return self._ranking.index(entry) + 1 if entry is not None else None
+
+    def leaderboard(self, limit=LEADERBOARD_SIZE):
+        with self._lock:
+            top = list(self._ranking.islice(0, limit))
+            players = len(self._ranking)
+        return {
+            'day': self.day,
+            'seed': self.seed,
+            'par': self.par,
+            'players': players,
+            'scores': [
+                {'rank': i + 1, 'moves': moves, 'runtime': None if runtime == float('inf') else runtime}
+                for i, (moves, runtime, _, _) in enumerate(top)
+            ],
+        }
+
+
+_challenges = {}
+_challenges_lock = threading.Lock()
+
+
+def get_challenge(day=None):
+    day = day or today()
+    challenge = _challenges.get(day)
+    if challenge is not None:
+        return challenge
+    with _challenges_lock:
+        challenge = _challenges.get(day)
+        if challenge is None:
+            challenge = Challenge(day)
+            _challenges[day] = challenge
+            # Never evict the day just asked for, or a late win would land on a dropped board
+            for old_day in sorted(_challenges)[:-KEEP_DAYS]:
+                if old_day != day:
+                    del _challenges[old_day]
+    return challenge
@@ -14,4 +14,5 @@ if [ -f /app/frontend/index.html ]; then
     sed -i "s|<base href=\"[^\"]*\">|<base href=\"${BASE_PATH}\">|" /app/frontend/index.html
 fi
 
-exec gunicorn --bind 0.0.0.0:5000 app:app
+# Worker class, preload and worker counts live in gunicorn.conf.py
+exec gunicorn -c gunicorn.conf.py app:app
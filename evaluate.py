@@ -0,0 +1,109 @@
+# evaluate.py
+# Batched heuristic scoring of FreeCell positions with NumPy.
+#
+# A batch of N positions is three arrays of card codes (cards.card_code, i.e. suit-major
+# index into cards.DECK):
+#   tableau     (N, 8, max_len)  columns top-to-bottom, padded with EMPTY after the last card
+#   freecells   (N, 4)           EMPTY for an empty cell
+#   foundations (N, 4)           number of cards on each foundation, in cards.SUITS order
+# Any value outside 0..51 counts as empty, so -1 or 255 padding both work.
+import numpy as np
+import cards
+
+EMPTY = -1
+NUM_RANKS = len(cards.RANKS)
+RED_SUITS = np.array([suit in ('H', 'D') for suit in cards.SUITS])
+LOW_WINDOW = 2  # the next LOW_WINDOW cards each foundation needs count as "low"
+
+# Higher score is better
+WEIGHTS = {
+    'foundation_cards': 10.0,
+    'out_of_order': -1.0,
+    'low_card_depth': -0.5,
+    'ace_depth': -0.5,
+    'free_cells': 1.0,
+    'empty_columns': 2.5,
+    'max_movable': 0.25,
+}
+
+
+def encode_states(states, max_len=None):
+    """Encode game state dicts (tableau/freecells/foundations of Card objects) as a batch."""
+    if max_len is None:
+        max_len = max((len(col) for state in states for col in state['tableau']), default=1)
+    n = len(states)
+    tableau = np.full((n, 8, max_len), EMPTY, dtype=np.int16)
+    freecells = np.full((n, 4), EMPTY, dtype=np.int16)
+    foundations = np.zeros((n, len(cards.SUITS)), dtype=np.int16)
+    for i, state in enumerate(states):
+        for c, col in enumerate(state['tableau']):
+            tableau[i, c, :len(col)] = [cards.card_code(card) for card in col]
+        for f, card in enumerate(state['freecells']):
+            if card is not None:
+                freecells[i, f] = cards.card_code(card)
+        for s, suit in enumerate(cards.SUITS):
+            foundations[i, s] = len(state['foundations'][suit])
+    return tableau, freecells, foundations
+
+
+def features(tableau, freecells, foundations):
+    """Per-position feature arrays, all of shape (N,) except the per-column ones (N, 8)."""
+    tableau = np.asarray(tableau).astype(np.int16, copy=False)
+    freecells = np.asarray(freecells).astype(np.int16, copy=False)
+    foundations = np.asarray(foundations).astype(np.int16, copy=False)
+    n = tableau.shape[0]
+
+    valid = (tableau >= 0) & (tableau < 52)
+    codes = np.where(valid, tableau, 0)
+    rank = codes % NUM_RANKS           # 0 = ace
+    suit = codes // NUM_RANKS
+    red = RED_SUITS[suit]
+    lengths = valid.sum(axis=2)        # (N, 8)
+
+    # Adjacent pairs that don't form a descending alternating-colour sequence
+    pair_valid = valid[:, :, :-1] & valid[:, :, 1:]
+    in_sequence = (rank[:, :, :-1] == rank[:, :, 1:] + 1) & (red[:, :, :-1] != red[:, :, 1:])
+    out_of_order_cols = (pair_valid & ~in_sequence).sum(axis=2)
+
+    # Cards covering each card
+    depth = lengths[:, :, None] - 1 - np.arange(tableau.shape[2])[None, None, :]
+    depth = np.where(valid, depth, 0)
+
+    # Cards each foundation needs soon, and how deeply they are buried
+    needed = foundations[np.arange(n)[:, None, None], suit]
+    low = valid & (rank >= needed) & (rank < needed + LOW_WINDOW)
+    low_card_depth = (depth * low).sum(axis=(1, 2))
+    ace_depth = (depth * (valid & (rank == 0))).sum(axis=(1, 2))
+
+    free_cells = ((freecells < 0) | (freecells >= 52)).sum(axis=1)
+    empty_columns = (lengths == 0).sum(axis=1)
+    # Same limit game_logic.move_cards enforces (for a move to a non-empty column)
+    max_movable = (free_cells + 1) * (empty_columns + 1)
+
+    return {
+        'foundation_cards': foundations.sum(axis=1),
+        'out_of_order_columns': out_of_order_cols,
+        'out_of_order': out_of_order_cols.sum(axis=1),
+        'low_card_depth': low_card_depth,
+        'ace_depth': ace_depth,
+        'free_cells': free_cells,
+        'empty_columns': empty_columns,
+        'max_movable': max_movable,
+    }
+
+
+def evaluate(tableau, freecells, foundations, weights=WEIGHTS):
+    """Score every position in the batch in one pass; returns a float array of shape (N,)."""
+    feats = features(tableau, freecells, foundations)
+    score = np.zeros(np.asarray(tableau).shape[0], dtype=np.float64)
+    for name, weight in weights.items():
+        score += weight * feats[name]
+    return score
+
+
+def rank_states(states, weights=WEIGHTS):
+    """Indices of states ordered best-first, e.g. for ordering a search's children."""
+    if not states:
+        return np.zeros(0, dtype=np.intp)
+    scores = evaluate(*encode_states(states), weights=weights)
+    return np.argsort(-scores, kind='stable')
@@ -13,22 +13,25 @@ function getAutoMoveAnimDelay() {
 }
 
 // Use dynamic delay for tableau (supermove) animation
-export async function runAnimationFromTableau(numCards, srcIdx, destIdx, state, delay) {
+// steps: single-card steps planned by the server; planned locally if not given
+export async function runAnimationFromTableau(numCards, srcIdx, destIdx, state, delay, steps = null) {
     // If delay arg is undefined, use global
     if (typeof delay !== "number") delay = getDoubleClickAnimDelay();
 
     let animTableau = state.tableau.map(col => col.slice());
     let animFreecells = state.freecells.slice();
 
-    // Helper for "how many cards could be moved in one supermove"
-    const maxMovable = countMaxMovable(animTableau, animFreecells, srcIdx, destIdx);
-    if (numCards > maxMovable) {
-        throw new Error('Not enough freecells or empty columns to move that many cards!');
-    }
-
-    let steps = buildAnimStepsGreedy(numCards, srcIdx, destIdx, animTableau, animFreecells);
     if (!steps) {
-        throw new Error('Not enough freecells or empty columns to move that many cards!');
+        // Helper for "how many cards could be moved in one supermove"
+        const maxMovable = countMaxMovable(animTableau, animFreecells, srcIdx, destIdx);
+        if (numCards > maxMovable) {
+            throw new Error('Not enough freecells or empty columns to move that many cards!');
+        }
+
+        steps = buildAnimStepsGreedy(numCards, srcIdx, destIdx, animTableau, animFreecells);
+        if (!steps) {
+            throw new Error('Not enough freecells or empty columns to move that many cards!');
+        }
     }
 
     // Animate each step (move) in order, one at a time
@@ -1,6 +1,6 @@
 import { setupRender, renderGame, highlightSelection, clearSelection } from './render.js';
 import { isAnimating, autoMoveOnDoubleClick, selectSourceOrMove, runAutoMoveToFoundation, resetSelection } from './moveLogic.js';
-import { fetchInitialState, newGame, undoMove, restartGame, setMoveCount, incrementMoveCount } from './state.js';
+import { fetchInitialState, newGame, dailyGame, undoMove, redoMove, seekToMove, restartGame, setMoveCount, incrementMoveCount, subscribeToServerEvents } from './state.js';
 import { showMessage } from './ui.js';
 import { state } from './state.js';
 
@@ -99,6 +99,12 @@ window.AUTO_MOVE_ANIM_DELAY = AUTO_MOVE_ANIM_DELAY;
 // ========== Main Controls ==========
 document.getElementById('restart-btn').addEventListener('click', restartGame);
 document.getElementById('undo-btn').addEventListener('click', undoMove);
+document.getElementById('redo-btn').addEventListener('click', redoMove);
+// Jump through history when the slider is released
+document.getElementById('history-slider').addEventListener('change', e => {
+    if (isAnimating.value) return;
+    seekToMove(Number(e.target.value));
+});
 document.getElementById('cancel-game-btn').addEventListener('click', async () => {
     await fetch('cancel', { method: 'POST', credentials: 'same-origin' });
     await fetchInitialState();
@@ -138,7 +144,7 @@ function renderHighScores(scores) {
     if (!scores.length) {
         const tr = document.createElement('tr');
         const td = document.createElement('td');
-        td.colSpan = 5;
+        td.colSpan = 7;
         td.textContent = 'No high scores yet!';
         tr.appendChild(td);
         highScoresTableBody.appendChild(tr);
@@ -159,6 +165,7 @@ function renderHighScores(scores) {
             <td>${formattedRuntime}</td>
             <td>${entry.seed !== undefined ? entry.seed : ''}</td>
             <td>${entry.moves}</td>
+            <td>${entry.par != null ? entry.par : ''}</td>
         `;
         highScoresTableBody.appendChild(tr);
     });
@@ -174,6 +181,10 @@ function fetchAndShowHighScores() {
 }
 
 highScoresBtn.addEventListener('click', fetchAndShowHighScores);
+// Another tab of this session set a high score; refresh if the table is open
+window.addEventListener('high-scores-changed', () => {
+    if (!highScoresModal.classList.contains('hidden')) fetchAndShowHighScores();
+});
 closeHighScoresBtn.addEventListener('click', () => {
     highScoresModal.classList.add('hidden');
 });
@@ -190,6 +201,61 @@ if (clearHighScoresBtn) {
     });
 }
 
+// ========== Daily Challenge ==========
+const dailyModal = document.getElementById('daily-modal');
+const dailyTableBody = document.querySelector('#daily-table tbody');
+
+function formatRuntime(runtime) {
+    if (runtime == null) return '';
+    const mins = Math.floor(runtime / 60);
+    const secs = Math.round(runtime % 60);
+    return `${mins}:${secs.toString().padStart(2, '0')}`;
+}
+
+function renderDailyLeaderboard(board) {
+    const par = board.par != null ? ` · Par ${board.par}` : '';
+    const rank = board.your_rank != null ? ` · Your rank: #${board.your_rank}` : '';
+    document.getElementById('daily-summary').textContent =
+        `${board.day} · Seed ${board.seed}${par} · ${board.players} finished${rank}`;
+    dailyTableBody.innerHTML = '';
+    if (!board.scores.length) {
+        const tr = document.createElement('tr');
+        const td = document.createElement('td');
+        td.colSpan = 3;
+        td.textContent = 'No one has finished today yet!';
+        tr.appendChild(td);
+        dailyTableBody.appendChild(tr);
+        return;
+    }
+    board.scores.forEach(entry => {
+        const tr = document.createElement('tr');
+        tr.innerHTML = `
+            <td>${entry.rank}</td>
+            <td>${entry.moves}</td>
+            <td>${formatRuntime(entry.runtime)}</td>
+        `;
+        dailyTableBody.appendChild(tr);
+    });
+}
+
+function fetchAndShowDailyLeaderboard() {
+    fetch('daily/leaderboard', { credentials: 'same-origin' })
+        .then(res => res.json())
+        .then(board => {
+            renderDailyLeaderboard(board);
+            dailyModal.classList.remove('hidden');
+        });
+}
+
+document.getElementById('daily-btn').addEventListener('click', () => {
+    dailyGame();
+    closeMenu();
+});
+document.getElementById('daily-leaderboard-btn').addEventListener('click', fetchAndShowDailyLeaderboard);
+document.getElementById('close-daily-btn').addEventListener('click', () => {
+    dailyModal.classList.add('hidden');
+});
+
 // ========== Card Interaction ==========
 document.body.addEventListener('click', e => {
     const cardOrPile = e.target.closest('.card, .pile, .freecell, .foundation');
@@ -208,6 +274,7 @@ document.body.addEventListener('dblclick', async e => {
 document.addEventListener('DOMContentLoaded', () => {
     setupRender();
     fetchInitialState();
+    subscribeToServerEvents();
     closeMenu();
     // Set slider values in global scope for animation.js
     window.DOUBLE_CLICK_ANIM_DELAY = DOUBLE_CLICK_ANIM_DELAY;
@@ -178,10 +178,11 @@ export async function doMove(numCards, src, dest) {
     if (src.startsWith('t') && dest.startsWith('t') && numCards > 1) {
         const srcIdx = parseInt(src.slice(1));
         const destIdx = parseInt(dest.slice(1));
-        const valid = await validateMove(numCards, convertLocationToOneBased(src), convertLocationToOneBased(dest));
-        if (!valid) return;
+        const validation = await validateMove(numCards, convertLocationToOneBased(src), convertLocationToOneBased(dest));
+        if (!validation) return;
         isAnimating.value = true;
-        await runAnimationFromTableau(numCards, srcIdx, destIdx, currentState); // delay is picked up dynamically
+        // Play the server's planned steps; delay is picked up dynamically
+        await runAnimationFromTableau(numCards, srcIdx, destIdx, currentState, undefined, validation.steps);
         isAnimating.value = false;
     }
 
@@ -368,7 +369,7 @@ async function validateMove(num, source, dest) {
     if (!res.ok || !json.valid) {
         showMessage('Illegal move: ' + (json.error || 'Not allowed'));
         resetSelection();
-        return false;
+        return null;
     }
-    return true;
+    return json;
 }
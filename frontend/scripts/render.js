@@ -13,6 +13,18 @@ export function renderGame(state, changedCols = null) {
     renderFreecells(state.freecells);
     renderFoundations(state.foundations);
     renderTableau(state.tableau, changedCols);
+    renderHistoryControls(state);
+}
+
+function renderHistoryControls(state) {
+    const slider = document.getElementById('history-slider');
+    if (!slider) return;
+    const length = state.history_length || 0;
+    const position = state.history_position || 0;
+    slider.max = length;
+    slider.value = position;
+    document.getElementById('history-position').textContent = `${position}/${length}`;
+    document.getElementById('redo-btn').disabled = position >= length;
 }
 
 export function renderTableauWithFakeFreecells(animTableau, fakeFreecells) {
@@ -1,6 +1,6 @@
 import { renderGame, clearSelection, gameState } from './render.js';
 import { showMessage } from './ui.js';
-import { runAutoMoveToFoundation, resetSelection } from './moveLogic.js';
+import { runAutoMoveToFoundation, resetSelection, isAnimating } from './moveLogic.js';
 import { startGameTimer, stopGameTimer, gameTimerInterval } from './main.js';
 
 // Global move count for session
@@ -55,6 +55,9 @@ export async function fetchInitialState() {
             seedDigits.textContent = "";
         }
 
+        // Par (best known move count for this seed)
+        document.getElementById('par-digits').textContent = json.par != null ? json.par : "";
+
         renderGame(json);
         resetSelection();
         showMessage('');
@@ -63,6 +66,7 @@ export async function fetchInitialState() {
         document.getElementById('kingsOnlyCheckbox').disabled = false;
         setMoveCount(0);
         document.getElementById('seed-digits').textContent = "";
+        document.getElementById('par-digits').textContent = "";
         stopGameTimer(); // Stop timer if there's no game
     }
 }
@@ -103,6 +107,17 @@ export async function newGame(seed = null) {
     }
 }
 
+// Start today's daily challenge (same deal for every player)
+export async function dailyGame() {
+    const res = await fetch('daily', { method: 'POST', credentials: 'same-origin' });
+    if (res.ok) {
+        await fetchInitialState();
+        showMessage('Daily challenge started!');
+    } else {
+        showMessage('Failed to start the daily challenge.');
+    }
+}
+
 // Restart current game (same seed, same rules)
 export async function restartGame() {
     // Use current seed and kings only setting
@@ -110,6 +125,10 @@ export async function restartGame() {
         showMessage("No game to restart.");
         return;
     }
+    if (currentState.daily) {
+        await dailyGame();
+        return;
+    }
     const res = await fetch('newgame', {
         method: 'POST',
         credentials: 'same-origin',
@@ -127,9 +146,9 @@ export async function restartGame() {
     }
 }
 
-// Undo last move
-export async function undoMove() {
-    const res = await fetch('undo', {
+// Undo / redo / jump share the same response handling
+async function historyAction(path, label) {
+    const res = await fetch(path, {
         method: 'POST',
         credentials: 'same-origin'
     });
@@ -149,10 +168,25 @@ export async function undoMove() {
         resetSelection();
         showMessage(json.message);
     } else {
-        showMessage('Undo failed: ' + json.error);
+        showMessage(`${label} failed: ` + json.error);
     }
 }
 
+// Undo last move
+export async function undoMove() {
+    await historyAction('undo', 'Undo');
+}
+
+// Redo the last undone move
+export async function redoMove() {
+    await historyAction('redo', 'Redo');
+}
+
+// Jump to the position after move k
+export async function seekToMove(k) {
+    await historyAction(`seek?move=${k}`, 'Jump');
+}
+
 // Main move handler, increments move count on success
 export async function tryMove(num, source, dest) {
     const res = await fetch('move', {
@@ -185,8 +219,9 @@ export async function tryMove(num, source, dest) {
             `Time: ${mins}:${secs.toString().padStart(2, '0')}`;
             clearInterval(gameTimerInterval)
             setTimeout(() => {
-                // Trigger the high scores modal as if user clicked the button
-                document.getElementById('high-scores-btn').click();
+                // Trigger the high scores (or daily leaderboard) modal as if user clicked the button
+                const btnId = json.daily_rank ? 'daily-leaderboard-btn' : 'high-scores-btn';
+                document.getElementById(btnId).click();
             }, 800); // Adjust delay as desired for nice UX
         }
 
@@ -200,3 +235,81 @@ export async function tryMove(num, source, dest) {
         return false;
     }
 }
+
+// ========== Server push (multi-tab sync) ==========
+let eventSource = null;
+
+// Show a state pushed from the server (another tab of this session changed the game)
+function showRemoteState(next) {
+    if (isAnimating.value) {
+        // Don't redraw mid-animation; resync once it has finished
+        setTimeout(fetchInitialState, 500);
+        return;
+    }
+    const newGameStarted = !currentState || currentState.start_time !== next.start_time;
+    currentState = next;
+    setMoveCount(next.move_count || 0);
+    document.getElementById('par-digits').textContent = next.par != null ? next.par : "";
+    if (newGameStarted) {
+        if (next.start_time) startGameTimer(next.start_time);
+        document.getElementById('seed-digits').textContent = next.seed ?? "";
+        document.getElementById('kingsOnlyCheckbox').checked = !!next.kings_only_on_empty_tableau;
+        document.getElementById('kingsOnlyCheckbox').disabled = true;
+    }
+    renderGame(next);
+    resetSelection();
+}
+
+function applyFullState(full) {
+    if (currentState && currentState.start_time === full.start_time && currentState.version >= full.version) {
+        return; // Already showing this (e.g. it's the response to our own request)
+    }
+    showRemoteState(full);
+}
+
+function applyPatch(patch) {
+    if (!currentState || currentState.version !== patch.base) {
+        if (currentState && currentState.version >= patch.version) return;
+        fetchInitialState(); // Missed an update; start over from a full state
+        return;
+    }
+    const next = {
+        ...currentState,
+        tableau: currentState.tableau.slice(),
+        foundations: { ...currentState.foundations }
+    };
+    for (const [path, value] of Object.entries(patch.set)) {
+        const [key, sub] = path.split('.');
+        if (sub === undefined) {
+            next[key] = value;
+        } else if (key === 'tableau') {
+            next.tableau[Number(sub)] = value;
+        } else {
+            next[key][sub] = value;
+        }
+    }
+    showRemoteState(next);
+}
+
+export function subscribeToServerEvents() {
+    if (eventSource || typeof EventSource === 'undefined') return;
+    eventSource = new EventSource('events', { withCredentials: true });
+    eventSource.addEventListener('state', e => applyFullState(JSON.parse(e.data)));
+    eventSource.addEventListener('patch', e => applyPatch(JSON.parse(e.data)));
+    eventSource.addEventListener('cancel', () => fetchInitialState());
+    eventSource.addEventListener('ended', () => fetchInitialState());
+    eventSource.addEventListener('won', e => {
+        const { runtime } = JSON.parse(e.data);
+        stopGameTimer();
+        if (runtime != null) {
+            const mins = Math.floor(runtime / 60);
+            const secs = Math.round(runtime % 60);
+            document.getElementById('game-runtime').textContent =
+            `Time: ${mins}:${secs.toString().padStart(2, '0')}`;
+        }
+        showMessage('You won!');
+    });
+    eventSource.addEventListener('high-scores', () => {
+        window.dispatchEvent(new Event('high-scores-changed'));
+    });
+}
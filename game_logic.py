@@ -1,6 +1,40 @@
 # game_logic.py:
 import cards
 import utils
+import random
+import functools
+import tables
+
+def copy_board(state):
+    # Cards are never mutated, so copying the piles is enough and copies can share cards
+    return {
+        'tableau': [col[:] for col in state['tableau']],
+        'freecells': state['freecells'][:],
+        'foundations': {suit: pile[:] for suit, pile in state['foundations'].items()},
+        'kings_only_on_empty_tableau': state.get('kings_only_on_empty_tableau', False),
+    }
+
+def deal_tableau(seed=None):
+    tableau = [[] for _ in range(8)]
+    codes = tables.deal_codes(seed)
+    if codes is not None:
+        # Standard seeds come straight from the shared deal table
+        for i, code in enumerate(codes.tolist()):
+            tableau[i % 8].append(cards.DECK[code])
+        return tableau
+
+    deck = list(cards.DECK)
+    rng = random.Random()
+    # Only set seed if valid
+    if seed is not None and str(seed).lower() != 'none' and str(seed).strip() != "":
+        try:
+            rng.seed(int(seed))
+        except (ValueError, TypeError):
+            rng.seed(str(seed))
+    rng.shuffle(deck)
+    for i, card in enumerate(deck):
+        tableau[i % 8].append(card)
+    return tableau
 
 def can_move_stack(stack):
     for i in range(len(stack) - 1):
@@ -70,6 +104,75 @@ def move_cards(tableau, num_cards, from_col_idx, to_col_idx, freecells=None, kin
     del from_col[-num_cards:]
     return True, ""
 
+@functools.lru_cache(maxsize=1024)
+def _supermove_cost(num_cards, cells, empties):
+    """(steps, split) for moving num_cards with this many free cells and spare empty columns.
+
+    steps is None if it can't be done; split is how many cards get parked in an empty column.
+    """
+    if num_cards <= cells + empties + 1:
+        # Park all but the bottom card one per spot, move it, then unpark in reverse
+        return 2 * num_cards - 1, None
+    if empties == 0:
+        return None, None
+    # Park the top `split` cards in an empty column, move the rest, then bring the parked
+    # cards over; each sub-move can still use the remaining empty columns
+    best = (None, None)
+    for split in range(1, num_cards):
+        parked, _ = _supermove_cost(split, cells, empties - 1)
+        rest, _ = _supermove_cost(num_cards - split, cells, empties - 1)
+        if parked is None or rest is None:
+            continue
+        total = 2 * parked + rest
+        if best[0] is None or total < best[0]:
+            best = (total, split)
+    return best
+
+def _plan_steps(num_cards, from_col_idx, to_col_idx, cells, empties, steps):
+    source = ('tableau', from_col_idx)
+    dest = ('tableau', to_col_idx)
+    if num_cards <= len(cells) + len(empties) + 1:
+        spots = ([('freecell', i) for i in cells] + [('tableau', i) for i in empties])[:num_cards - 1]
+        steps.extend((source, spot) for spot in spots)
+        steps.append((source, dest))
+        steps.extend((spot, dest) for spot in reversed(spots))
+        return
+    _, split = _supermove_cost(num_cards, len(cells), len(empties))
+    helper, rest = empties[0], empties[1:]
+    _plan_steps(split, from_col_idx, helper, cells, rest, steps)
+    _plan_steps(num_cards - split, from_col_idx, to_col_idx, cells, rest, steps)
+    _plan_steps(split, helper, to_col_idx, cells, rest, steps)
+
+def plan_supermove(tableau, freecells, num_cards, from_col_idx, to_col_idx, kings_only_on_empty_tableau=False):
+    """Single-card steps ((from_type, idx), (to_type, idx)) that carry out a tableau move.
+
+    Uses free cells and empty columns (recursively) as parking spots and picks the split
+    that needs the fewest steps. Returns None if the move can't be done one card at a time
+    (e.g. the kings-only rule keeps empty columns from being used as parking spots).
+    """
+    cells = [i for i, c in enumerate(freecells) if c is None]
+    empties = [] if kings_only_on_empty_tableau else [
+        i for i, col in enumerate(tableau)
+        if len(col) == 0 and i != from_col_idx and i != to_col_idx
+    ]
+    # The most the decomposition can carry; also keeps a bogus num_cards away from the search
+    if not 0 < num_cards <= (len(cells) + 1) * 2 ** len(empties):
+        return None
+    cost, _ = _supermove_cost(num_cards, len(cells), len(empties))
+    if cost is None:
+        return None
+    steps = []
+    _plan_steps(num_cards, from_col_idx, to_col_idx, cells, empties, steps)
+    return steps
+
+def move_steps(state, num, source_type, source_idx, dest_type, dest_idx):
+    """Single-card steps for a move about to be made (a one-step list unless it's a supermove)."""
+    if source_type == 'tableau' and dest_type == 'tableau':
+        return plan_supermove(
+            state['tableau'], state['freecells'], num, source_idx, dest_idx,
+            kings_only_on_empty_tableau=state.get('kings_only_on_empty_tableau', False)
+        )
+    return [((source_type, source_idx), (dest_type, dest_idx))]
 
 def move_to_freecell(tableau, freecells, from_col_idx, freecell_idx, validate_only=False):
     col = tableau[from_col_idx]
@@ -0,0 +1,28 @@
+# gunicorn.conf.py
+import gc
+import os
+
+bind = "0.0.0.0:5000"
+# gevent workers keep idle /events streams cheap (one greenlet each, not one thread)
+worker_class = "gevent"
+worker_connections = int(os.environ.get("WORKER_CONNECTIONS", "20000"))
+workers = int(os.environ.get("WEB_CONCURRENCY", "1"))
+
+# Import the app once in the master and fork workers from it, so read-only tables
+# and module code are shared copy-on-write instead of rebuilt per worker
+preload_app = os.environ.get("PRELOAD", "1") != "0"
+
+if preload_app:
+    # The app is imported before the workers patch themselves, so patch the master first;
+    # otherwise locks and threads created at import time stay blocking OS primitives
+    from gevent import monkey
+    monkey.patch_all()
+
+
+def when_ready(server):
+    if preload_app:
+        import tables, seed_index
+        tables.preload()
+        seed_index.preload()
+        # Keep the collector from touching (and so copying) every preloaded object in each worker
+        gc.freeze()
@@ -1,6 +1,9 @@
 import cards, game_logic, display, utils
 import random
 import time
+import sys
+import json
+import argparse
 
 def create_deck():
     return [cards.Card(rank, suit) for suit in cards.SUITS for rank in cards.RANKS]
@@ -159,5 +162,103 @@ def main():
         else:
             print("Invalid command format. Use: move N from tX to tY/fZ/dS, 'undo', or 'quit'.\n")
 
+# ---------------- Headless batch mode ----------------
+# Input: NDJSON lines {"seed": 123, "moves": [[1, "t3", "f1"], ...], "kings_only_on_empty_tableau": false}
+# ("id" is optional and echoed back). Output: one NDJSON result per game, in input order.
+
+def parse_move(move):
+    """(num, source, dest) from a move record; raises ValueError if it's malformed."""
+    if isinstance(move, dict):
+        num, source, dest = move.get('num'), move.get('source'), move.get('dest')
+    elif isinstance(move, str):
+        # Same syntax as the interactive prompt: "move 1 from t2 to f1"
+        parts = move.strip().lower().split()
+        if not (len(parts) == 6 and parts[0] == 'move' and parts[2] == 'from' and parts[4] == 'to'):
+            raise ValueError(f"Invalid move: {move!r}")
+        num, source, dest = parts[1], parts[3], parts[5]
+    elif isinstance(move, list) and len(move) == 3:
+        num, source, dest = move
+    else:
+        raise ValueError(f"Invalid move: {move!r}")
+    if not isinstance(source, str) or not isinstance(dest, str):
+        raise ValueError("Source and destination must be strings")
+    if isinstance(num, bool) or (isinstance(num, float) and not num.is_integer()):
+        raise ValueError("Number of cards must be an integer")
+    try:
+        num = int(num)
+    except (ValueError, TypeError):
+        raise ValueError("Number of cards must be an integer")
+    if num < 1:
+        raise ValueError("Number of cards must be at least 1")
+    return num, source, dest
+
+def run_game(game):
+    state = {
+        'tableau': game_logic.deal_tableau(game.get('seed')),
+        'freecells': [None] * 4,
+        'foundations': {suit: [] for suit in cards.SUITS},
+        'kings_only_on_empty_tableau': bool(game.get('kings_only_on_empty_tableau', False)),
+    }
+    result = {'seed': game.get('seed')}
+    if 'id' in game:
+        result['id'] = game['id']
+
+    moves = game.get('moves', [])
+    if not isinstance(moves, list):
+        result['error'] = "'moves' must be a list"
+        return result
+
+    first_illegal = None
+    applied = 0
+    for i, raw in enumerate(moves):
+        try:
+            num, source, dest = parse_move(raw)
+        except ValueError as e:
+            first_illegal = {'index': i, 'move': raw, 'reason': str(e)}
+            break
+        source_type, source_idx = utils.parse_location(source)
+        dest_type, dest_idx = utils.parse_location(dest)
+        if source_type is None or dest_type is None:
+            first_illegal = {'index': i, 'move': raw, 'reason': 'Invalid source or destination'}
+            break
+        success, reason = game_logic.dispatch_move(state, num, source_type, source_idx, dest_type, dest_idx)
+        if not success:
+            first_illegal = {'index': i, 'move': raw, 'reason': reason}
+            break
+        applied += 1
+
+    result['won'] = game_logic.check_win(state['foundations'])
+    result['moves'] = applied
+    result['first_illegal'] = first_illegal
+    return result
+
+def run_line(line):
+    try:
+        game = json.loads(line)
+    except ValueError as e:
+        return {'error': f"Invalid JSON: {e}"}
+    if not isinstance(game, dict):
+        return {'error': 'Each line must be a JSON object'}
+    return run_game(game)
+
+def batch(paths, workers=1, out=sys.stdout):
+    lines = utils.read_lines(paths or ['-'])
+    if workers == 1:
+        results = map(run_line, lines)
+    else:
+        results = utils.pool_map(run_line, lines, workers or None, chunksize=64)
+    for result in results:
+        out.write(json.dumps(result) + "\n")
+
 if __name__ == "__main__":
-    main()
+    parser = argparse.ArgumentParser(description="ASCII Freecell")
+    parser.add_argument('--batch', action='store_true',
+                        help="replay NDJSON games from files (or stdin) and print NDJSON results")
+    parser.add_argument('--workers', type=int, default=1,
+                        help="processes for --batch (0 = one per CPU)")
+    parser.add_argument('files', nargs='*', help="NDJSON input files for --batch ('-' for stdin)")
+    args = parser.parse_args()
+    if args.batch:
+        batch(args.files, args.workers)
+    else:
+        main()
@@ -0,0 +1,387 @@
+# par.py
+# Shortens winning move lists and keeps the best known ("par") move count per seed.
+import os
+import sys
+import json
+import fcntl
+from contextlib import contextmanager
+import cards, game_logic, utils
+
+PAR_FILE = "pars.json"
+REPLAYS_FILE = "replays.ndjson"  # winning games waiting to be shortened by the batch CLI
+REPLAYS_MAX_BYTES = int(os.environ.get("REPLAYS_MAX_BYTES", 64 * 1024 * 1024))  # then rotated to .1
+SHORTCUT_DEPTH = 2      # moves searched from each position when looking for shortcuts
+DROP_WINDOW = 12        # max distance between the two moves of a dropped pair
+MAX_DROP_EVALS = 4000   # replays allowed per local-search pass
+
+_pars_cache = (None, {})  # ((inode, mtime), pars) of the last pars.json read
+
+
+# ---------------- Par storage ----------------
+
+def load_pars():
+    if not os.path.exists(PAR_FILE):
+        return {}
+    with open(PAR_FILE, "r") as f:
+        return json.load(f)
+
+def save_pars(pars):
+    tmp_path = PAR_FILE + ".tmp"
+    with open(tmp_path, "w") as f:
+        json.dump(pars, f)
+    os.replace(tmp_path, PAR_FILE)
+
+@contextmanager
+def _file_lock(path):
+    # Every worker and the batch CLI update these files; serialize the read-modify-write
+    with open(path + ".lock", "a") as lock_file:
+        fcntl.flock(lock_file, fcntl.LOCK_EX)
+        try:
+            yield
+        finally:
+            fcntl.flock(lock_file, fcntl.LOCK_UN)
+
+def merge_pars(found):
+    """Merge {seed: moves} into pars.json, keeping the lower count per seed. Returns seeds improved."""
+    # Most wins don't beat par: check the in-memory copy before taking the lock and rewriting
+    current = cached_pars()
+    found = {key: moves for key, moves in found.items() if key not in current or moves < current[key]}
+    if not found:
+        return []
+    with _file_lock(PAR_FILE):
+        pars = load_pars()
+        improved = [key for key, moves in found.items() if key not in pars or moves < pars[key]]
+        if improved:
+            for key in improved:
+                pars[key] = found[key]
+            save_pars(pars)
+    return improved
+
+def cached_pars():
+    """pars.json as of its last change; re-read only when the file is replaced. Don't mutate."""
+    global _pars_cache
+    try:
+        st = os.stat(PAR_FILE)
+    except FileNotFoundError:
+        return {}
+    version = (st.st_ino, st.st_mtime_ns)
+    if _pars_cache[0] != version:
+        _pars_cache = (version, load_pars())
+    return _pars_cache[1]
+
+def get_par(seed, pars=None):
+    if pars is None:
+        pars = cached_pars()
+    return pars.get(str(seed))
+
+def record_par(seed, moves):
+    """Store moves as the par for seed if it beats the current one. Returns True if stored."""
+    if seed is None or not moves:
+        return False
+    return bool(merge_pars({str(seed): moves}))
+
+def save_replay(seed, moves):
+    """Append a win to replays.ndjson, first moving a full file to replays.ndjson.1.
+
+    Disk use stays under twice REPLAYS_MAX_BYTES; run the batch CLI on replays.ndjson.1
+    before the next rotation replaces it. Only the moves are logged (this runs on every
+    win); the batch CLI expands them into single-card steps.
+    """
+    line = json.dumps({'seed': seed, 'moves': moves}) + "\n"
+    with _file_lock(REPLAYS_FILE):
+        try:
+            if os.path.getsize(REPLAYS_FILE) >= REPLAYS_MAX_BYTES:
+                os.replace(REPLAYS_FILE, REPLAYS_FILE + ".1")
+        except FileNotFoundError:
+            pass
+        with open(REPLAYS_FILE, "a") as f:
+            f.write(line)
+
+
+# ---------------- Replay ----------------
+# Moves are (num, source, dest) exactly as sent to /move, e.g. (1, 't3', 'f1') or (1, 'f2', 'dH').
+# Internally a freecell is addressed by the card it holds, so moves stay valid when
+# earlier moves are removed and cards land in different freecell slots.
+
+def initial_state(seed, kings_only_on_empty_tableau=False):
+    return {
+        'tableau': game_logic.deal_tableau(seed),
+        'freecells': [None] * 4,
+        'foundations': {suit: [] for suit in cards.SUITS},
+        'kings_only_on_empty_tableau': kings_only_on_empty_tableau,
+    }
+
+def position_key(state):
+    # Card objects hash by identity, which is stable across game_logic.copy_board
+    return (
+        tuple(tuple(col) for col in state['tableau']),
+        frozenset(c for c in state['freecells'] if c is not None),
+        tuple(len(state['foundations'][suit]) for suit in cards.SUITS),
+    )
+
+def _as_move(move):
+    if isinstance(move, dict):
+        return (int(move['num']), move['source'], move['dest'])
+    num, source, dest = move
+    return (int(num), source, dest)
+
+def _moved_card(state, source_type, source_idx, num):
+    if source_type == 'tableau':
+        col = state['tableau'][source_idx]
+        return col[-num] if 0 < num <= len(col) else None
+    if source_type == 'freecell':
+        return state['freecells'][source_idx]
+    pile = state['foundations'][source_idx]
+    return pile[-1] if pile else None
+
+def _location(loc_type, idx):
+    if loc_type == 'tableau':
+        return f"t{idx + 1}"
+    if loc_type == 'freecell':
+        return f"f{idx + 1}"
+    return f"d{idx}"
+
+def apply_abstract(state, move):
+    """Apply (num, source, dest, card) in place; returns the concrete move or None if illegal."""
+    num, source, dest, card = move
+    source_type, source_idx = utils.parse_location(source) if source != 'f' else ('freecell', None)
+    dest_type, dest_idx = utils.parse_location(dest) if dest != 'f' else ('freecell', None)
+    if source_type == 'freecell' and source_idx is None:
+        source_idx = next((i for i, c in enumerate(state['freecells']) if c is card), None)
+        if source_idx is None:
+            return None
+    elif _moved_card(state, source_type, source_idx, num) is not card:
+        return None
+    if dest_type == 'freecell' and dest_idx is None:
+        dest_idx = next((i for i, c in enumerate(state['freecells']) if c is None), None)
+        if dest_idx is None:
+            return None
+    success, _ = game_logic.dispatch_move(state, num, source_type, source_idx, dest_type, dest_idx)
+    if not success:
+        return None
+    return (num, _location(source_type, source_idx), _location(dest_type, dest_idx))
+
+def to_abstract(state, moves):
+    """Replay concrete moves from state (mutating it) and return their abstract form."""
+    abstract = []
+    for i, move in enumerate(moves):
+        num, source, dest = _as_move(move)
+        source_type, source_idx = utils.parse_location(source)
+        dest_type, dest_idx = utils.parse_location(dest)
+        if source_type is None or dest_type is None:
+            raise ValueError(f"Move {i + 1}: invalid source or destination")
+        card = _moved_card(state, source_type, source_idx, num)
+        success, reason = game_logic.dispatch_move(state, num, source_type, source_idx, dest_type, dest_idx)
+        if not success:
+            raise ValueError(f"Move {i + 1}: {reason}")
+        abstract.append((
+            num,
+            'f' if source_type == 'freecell' else source,
+            'f' if dest_type == 'freecell' else dest,
+            card,
+        ))
+    return abstract
+
+def replay_positions(start, abstract):
+    """Positions before each move plus the final one, or None if a move is illegal."""
+    state = game_logic.copy_board(start)
+    positions = [game_logic.copy_board(state)]
+    for move in abstract:
+        if apply_abstract(state, move) is None:
+            return None
+        positions.append(game_logic.copy_board(state))
+    return positions
+
+def is_winning(start, abstract):
+    state = game_logic.copy_board(start)
+    for move in abstract:
+        if apply_abstract(state, move) is None:
+            return False
+    return game_logic.check_win(state['foundations'])
+
+def to_concrete(start, abstract):
+    state = game_logic.copy_board(start)
+    return [apply_abstract(state, move) for move in abstract]
+
+def single_card_moves(start, moves):
+    """Expand concrete moves into the single-card steps game_logic.move_steps plans for them."""
+    state = game_logic.copy_board(start)
+    steps = []
+    for i, move in enumerate(moves):
+        num, source, dest = _as_move(move)
+        source_type, source_idx = utils.parse_location(source)
+        dest_type, dest_idx = utils.parse_location(dest)
+        success, reason = game_logic.dispatch_move(
+            state, num, source_type, source_idx, dest_type, dest_idx, validate_only=True
+        )
+        if not success:
+            raise ValueError(f"Move {i + 1}: {reason}")
+        planned = game_logic.move_steps(state, num, source_type, source_idx, dest_type, dest_idx)
+        if planned is None:
+            raise ValueError(f"Move {i + 1}: can't be split into single-card steps")
+        game_logic.dispatch_move(state, num, source_type, source_idx, dest_type, dest_idx)
+        steps.extend((1, _location(*src), _location(*dst)) for src, dst in planned)
+    return steps
+
+
+# ---------------- Move generation ----------------
+
+def legal_moves(state):
+    """All abstract moves from state (foundation-to-tableau moves are never useful for par)."""
+    tableau = state['tableau']
+    freecells = state['freecells']
+    foundations = state['foundations']
+    kings_only = state.get('kings_only_on_empty_tableau', False)
+    moves = []
+
+    for suit in cards.SUITS:
+        for i, col in enumerate(tableau):
+            if col and game_logic.can_place_on_foundation(foundations[suit], col[-1])[0] and col[-1].suit == suit:
+                moves.append((1, f"t{i + 1}", f"d{suit}", col[-1]))
+        for card in freecells:
+            if card is not None and card.suit == suit and game_logic.can_place_on_foundation(foundations[suit], card)[0]:
+                moves.append((1, 'f', f"d{suit}", card))
+
+    for card in freecells:
+        if card is None:
+            continue
+        for j, col in enumerate(tableau):
+            if game_logic.can_place_on(col, [card], kings_only_on_empty_tableau=kings_only)[0]:
+                moves.append((1, 'f', f"t{j + 1}", card))
+
+    has_empty_freecell = any(c is None for c in freecells)
+    for i, col in enumerate(tableau):
+        if not col:
+            continue
+        if has_empty_freecell:
+            moves.append((1, f"t{i + 1}", 'f', col[-1]))
+        # Length of the ordered run at the bottom of the column
+        run = 1
+        while run < len(col) and game_logic.can_move_stack(col[-run - 1:-run + 1 or None])[0]:
+            run += 1
+        for j in range(len(tableau)):
+            if j == i:
+                continue
+            for num in range(1, run + 1):
+                success, _ = game_logic.move_cards(
+                    tableau, num, i, j, freecells,
+                    kings_only_on_empty_tableau=kings_only, validate_only=True
+                )
+                if success:
+                    moves.append((num, f"t{i + 1}", f"t{j + 1}", col[-num]))
+    return moves
+
+def _expand(state, depth):
+    """Yield (path, state) for every sequence of up to depth moves from state."""
+    frontier = [([], state)]
+    yield frontier[0]
+    for _ in range(depth):
+        next_frontier = []
+        for path, current in frontier:
+            for move in legal_moves(current):
+                child = game_logic.copy_board(current)
+                if apply_abstract(child, move) is None:
+                    continue
+                entry = (path + [move], child)
+                next_frontier.append(entry)
+                yield entry
+        frontier = next_frontier
+
+
+# ---------------- Optimizer ----------------
+
+def shortcut_pass(start, abstract, depth=SHORTCUT_DEPTH):
+    """Replace any stretch of the game by a shorter path (up to depth moves) to the same position.
+
+    Loops, freecell round-trips and single-card sequences that amount to one supermove
+    all show up as a later position reachable in fewer moves.
+    """
+    positions = replay_positions(start, abstract)
+    if positions is None:
+        return abstract
+    last_seen = {}
+    for j, position in enumerate(positions):
+        last_seen[position_key(position)] = j
+
+    result = []
+    i = 0
+    while i < len(abstract):
+        best_j, best_path = i + 1, [abstract[i]]
+        for path, state in _expand(positions[i], depth):
+            j = last_seen.get(position_key(state), -1)
+            if j - len(path) > best_j - len(best_path):
+                best_j, best_path = j, path
+        result.extend(best_path)
+        i = best_j
+    return result
+
+def drop_search(start, abstract, window=DROP_WINDOW, max_evals=MAX_DROP_EVALS):
+    """Bounded local search: drop single moves or pairs of nearby moves while the game stays won."""
+    evals = 0
+    i = 0
+    while i < len(abstract) and evals < max_evals:
+        candidate = abstract[:i] + abstract[i + 1:]
+        evals += 1
+        if is_winning(start, candidate):
+            abstract = candidate
+            continue
+        dropped = False
+        for j in range(i + 1, min(i + 1 + window, len(abstract))):
+            if evals >= max_evals:
+                break
+            candidate = abstract[:i] + abstract[i + 1:j] + abstract[j + 1:]
+            evals += 1
+            if is_winning(start, candidate):
+                abstract = candidate
+                dropped = True
+                break
+        if not dropped:
+            i += 1
+    return abstract
+
+def shorten(seed, moves, kings_only_on_empty_tableau=False, depth=SHORTCUT_DEPTH):
+    """Return a shorter winning move list for seed; raises ValueError if moves don't win."""
+    start = initial_state(seed, kings_only_on_empty_tableau)
+    end = game_logic.copy_board(start)
+    abstract = to_abstract(end, moves)
+    if not game_logic.check_win(end['foundations']):
+        raise ValueError("Move list does not win the game")
+
+    while True:
+        length = len(abstract)
+        abstract = shortcut_pass(start, abstract, depth)
+        abstract = drop_search(start, abstract)
+        if len(abstract) >= length:
+            break
+    return to_concrete(start, abstract)
+
+
+# ---------------- Batch CLI ----------------
+# Input: NDJSON lines {"seed": 123, "moves": [[1, "t3", "f1"], ...], "kings_only_on_empty_tableau": false}
+
+def _shorten_line(line):
+    try:
+        game = json.loads(line)
+        kings_only = game.get('kings_only_on_empty_tableau', False)
+        moves = shorten(game['seed'], game['moves'], kings_only)
+        try:
+            steps = single_card_moves(initial_state(game['seed'], kings_only), moves)
+        except ValueError:
+            steps = None  # kings-only supermoves that need an empty column as a parking spot
+        return {'seed': game['seed'], 'original': len(game['moves']), 'moves': moves, 'steps': steps}
+    except (ValueError, KeyError, TypeError) as e:
+        return {'error': str(e)}
+
+def main(argv):
+    found = {}
+    lines = utils.read_lines(argv or ['-'])
+    for result in utils.pool_map(_shorten_line, lines, ordered=False, chunksize=4):
+        if 'error' not in result:
+            key = str(result['seed'])
+            found[key] = min(found.get(key, len(result['moves'])), len(result['moves']))
+        print(json.dumps(result), flush=True)
+    # Re-read under the lock so pars the server recorded during the run are kept
+    merge_pars(found)
+
+if __name__ == '__main__':
+    main(sys.argv[1:])
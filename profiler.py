@@ -0,0 +1,103 @@
+# profiler.py
+# On-demand sampling profiler for a live worker.
+#
+# Nothing runs until a profile is requested: sample() starts one OS thread that reads
+# every other thread's current stack (sys._current_frames) at a fixed interval, then
+# exits. Samples are returned as collapsed stacks ("a;b;c 12" per line), the input
+# format of flamegraph.pl, speedscope and similar tools.
+#
+# Under gevent the sampler must be a real OS thread, not a greenlet: a greenlet would only
+# get to run when the handler being measured yields, so it would never see it working.
+import os
+import sys
+import time
+import threading
+from collections import Counter
+
+ADMIN_TOKEN = os.environ.get("ADMIN_TOKEN")  # /debug/profile is disabled unless this is set
+SAMPLE_INTERVAL = 0.005  # seconds between samples (200 Hz)
+MAX_SECONDS = 60
+OTHER = "(other)"        # root for samples not inside a handler (idle hub, server loop, ...)
+
+_lock = threading.Lock()
+
+
+def _os_thread_tools():
+    # The unpatched primitives, even when gevent has monkey patched threading and time
+    try:
+        from gevent import monkey
+        return (
+            monkey.get_original('_thread', 'start_new_thread'),
+            monkey.get_original('_thread', 'get_ident'),
+            monkey.get_original('time', 'sleep'),
+        )
+    except ImportError:
+        import _thread
+        return _thread.start_new_thread, _thread.get_ident, time.sleep
+
+
+def _frame_name(frame, names):
+    code = frame.f_code
+    name = names.get(code)
+    if name is None:
+        name = f"{frame.f_globals.get('__name__', '?')}.{code.co_name}"
+        names[code] = name
+    return name
+
+
+def collapse(frame, names, handlers=frozenset()):
+    """Collapsed stack for a frame, rooted at the request handler if it's inside one.
+
+    handlers holds the code objects of the view functions (app.move, app.undo, ...).
+    """
+    stack = []
+    handler_depth = None
+    while frame is not None:
+        stack.append(_frame_name(frame, names))
+        if frame.f_code in handlers:
+            handler_depth = len(stack)
+        frame = frame.f_back
+    if handler_depth is None:
+        return f"{OTHER};{stack[0]}"
+    return ";".join(reversed(stack[:handler_depth]))
+
+
+def sample(seconds, handlers=frozenset(), interval=SAMPLE_INTERVAL):
+    """Sample every thread for `seconds`; returns a Counter of collapsed stacks.
+
+    Returns None if another profile is already running in this process.
+    """
+    if not _lock.acquire(blocking=False):
+        return None
+    try:
+        start_thread, get_ident, os_sleep = _os_thread_tools()
+        counts = Counter()
+        done = []
+
+        def run():
+            try:
+                me = get_ident()
+                names = {}
+                deadline = time.perf_counter() + seconds
+                while time.perf_counter() < deadline:
+                    frames = sys._current_frames()
+                    frames.pop(me, None)
+                    for frame in frames.values():
+                        counts[collapse(frame, names, handlers)] += 1
+                    frames = frame = None  # don't keep other threads' frames alive
+                    os_sleep(interval)
+            finally:
+                done.append(True)
+
+        start_thread(run, ())
+        # time.sleep is gevent's when patched, so other requests keep being served meanwhile
+        time.sleep(seconds)
+        while not done:
+            time.sleep(interval)
+        return counts
+    finally:
+        _lock.release()
+
+
+def format_collapsed(counts):
+    return "".join(f"{stack} {n}\n" for stack, n in counts.most_common())
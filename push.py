@@ -0,0 +1,135 @@
+# push.py
+# Server push channel: every open tab of a session subscribes over Server-Sent Events
+# and receives state patches and win/high-score events as they happen.
+import json
+import queue
+import threading
+
+KEEPALIVE_SECONDS = 25   # comment line sent on idle connections so proxies keep them open
+SUBSCRIBER_QUEUE_SIZE = 64
+
+
+def encode_event(event, data):
+    return f"event: {event}\ndata: {json.dumps(data, separators=(',', ':'))}\n\n".encode()
+
+
+def state_patch(old, new):
+    """Changed parts of a serialized state, keyed by path ('tableau.3', 'foundations.H', 'move_count', ...)."""
+    patch = {}
+    for key, value in new.items():
+        old_value = old.get(key)
+        if value == old_value:
+            continue
+        if key == 'tableau' and old_value is not None and len(old_value) == len(value):
+            for i, col in enumerate(value):
+                if col != old_value[i]:
+                    patch[f"tableau.{i}"] = col
+        elif key == 'foundations' and old_value is not None:
+            for suit, pile in value.items():
+                if pile != old_value.get(suit):
+                    patch[f"foundations.{suit}"] = pile
+        else:
+            patch[key] = value
+    return patch
+
+
+def _close(q):
+    # End a subscriber's stream: its backlog is stale anyway, so clear room for the sentinel
+    while True:
+        try:
+            q.put_nowait(None)
+            return
+        except queue.Full:
+            try:
+                while True:
+                    q.get_nowait()
+            except queue.Empty:
+                pass
+
+
+class Broker:
+    """Per-session fan-out of encoded events to subscriber queues."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._subscribers = {}   # session id -> set of queues
+        self._last_state = {}    # session id -> last serialized state sent (only while subscribed)
+
+    def subscribe(self, sid):
+        q = queue.Queue(maxsize=SUBSCRIBER_QUEUE_SIZE)
+        with self._lock:
+            self._subscribers.setdefault(sid, set()).add(q)
+        return q
+
+    def unsubscribe(self, sid, q):
+        with self._lock:
+            subs = self._subscribers.get(sid)
+            if subs is None:
+                return
+            subs.discard(q)
+            if not subs:
+                del self._subscribers[sid]
+                self._last_state.pop(sid, None)
+
+    def has_subscribers(self, sid):
+        return sid in self._subscribers
+
+    def publish(self, sid, event, data):
+        subs = self._subscribers.get(sid)
+        if not subs:
+            return
+        message = encode_event(event, data)  # encoded once, shared by every tab
+        with self._lock:
+            targets = list(self._subscribers.get(sid, ()))
+        for q in targets:
+            try:
+                q.put_nowait(message)
+            except queue.Full:
+                # A stalled client; dropping it makes the browser reconnect and resync
+                self.unsubscribe(sid, q)
+                _close(q)
+
+    def publish_state(self, sid, state):
+        """Send a patch against the last state this session's tabs saw (or the full state)."""
+        if not self.has_subscribers(sid):
+            return
+        with self._lock:
+            last = self._last_state.get(sid)
+            self._last_state[sid] = state
+        if last is None or last.get('version', 0) != state.get('version', 0) - 1:
+            self.publish(sid, 'state', state)
+        else:
+            self.publish(sid, 'patch', {
+                'base': last.get('version', 0),
+                'version': state.get('version', 0),
+                'set': state_patch(last, state),
+            })
+
+    def publish_game_over(self, sid, event, data=None):
+        with self._lock:
+            self._last_state.pop(sid, None)
+        self.publish(sid, event, data or {})
+
+    def stream(self, sid, initial_state=None):
+        """Generator for one SSE connection; yields bytes until the client goes away."""
+        q = self.subscribe(sid)
+        try:
+            yield b"retry: 2000\n\n"
+            if initial_state is not None:
+                with self._lock:
+                    self._last_state[sid] = initial_state
+                yield encode_event('state', initial_state)
+            while True:
+                try:
+                    message = q.get(timeout=KEEPALIVE_SECONDS)
+                except queue.Empty:
+                    yield b": keepalive\n\n"
+                    continue
+                if message is None:
+                    return
+                yield message
+        finally:
+            self.unsubscribe(sid, q)
+
+
+broker = Broker()
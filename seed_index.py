@@ -0,0 +1,144 @@
+# seed_index.py
+# Per-seed deal features for every standard seed, built from the deal table and stored
+# as a memory-mapped structured array, plus a small filter language to query it:
+#   ace_depth_max<=2                       every ace within 2 cards of a column bottom
+#   kings_buried_max_column>=4             some column has 4+ kings covering other cards
+#   disorder=20..30,suit_clusters>=6       clauses are ANDed; a..b is an inclusive range
+import os
+import re
+import numpy as np
+import evaluate, tables
+
+SEED_INDEX_FILE = os.environ.get("SEED_INDEX_FILE", "seed_index.npy")
+
+INDEX_DTYPE = np.dtype([
+    ('seed', '<i4'),
+    ('ace_depth_max', 'i1'),            # cards covering the most buried ace
+    ('ace_depth_sum', 'i1'),
+    ('low_card_depth', 'i2'),           # cards covering the aces and twos, summed
+    ('king_depth_sum', 'i1'),
+    ('kings_buried', 'i1'),             # kings dealt on top of other cards (not at the column top)
+    ('kings_buried_max_column', 'i1'),
+    ('disorder', 'i1'),                 # adjacent pairs not in descending alternating order
+    ('disorder_max_column', 'i1'),
+    ('suit_clusters', 'i1'),            # adjacent pairs of the same suit
+    ('score', '<f4'),                   # evaluate.evaluate score of the opening position
+])
+FIELDS = INDEX_DTYPE.names
+
+_index = None
+
+
+def deal_layouts():
+    """(NUM_SEEDS, 8, 7) card codes for every deal, padded with evaluate.EMPTY."""
+    deals = np.asarray(tables.deal_table())
+    layouts = np.full((len(deals), 8, 7), evaluate.EMPTY, dtype=np.int16)
+    for c in range(8):
+        column = deals[:, c::8]  # card i of the deck goes to column i % 8
+        layouts[:, c, :column.shape[1]] = column
+    return layouts
+
+
+def build_index():
+    layouts = deal_layouts()
+    n = len(layouts)
+    freecells = np.full((n, 4), evaluate.EMPTY, dtype=np.int16)
+    foundations = np.zeros((n, 4), dtype=np.int16)
+    feats = evaluate.features(layouts, freecells, foundations)
+
+    valid = layouts >= 0
+    codes = np.where(valid, layouts, 0)
+    rank = codes % evaluate.NUM_RANKS
+    suit = codes // evaluate.NUM_RANKS
+    depth = valid.sum(axis=2)[:, :, None] - 1 - np.arange(layouts.shape[2])
+    depth = np.where(valid, depth, 0)
+
+    aces = valid & (rank == 0)
+    kings = valid & (rank == evaluate.NUM_RANKS - 1)
+    kings_buried_cols = (kings & (np.arange(layouts.shape[2]) > 0)).sum(axis=2)
+    pair_valid = valid[:, :, :-1] & valid[:, :, 1:]
+
+    index = np.zeros(n, dtype=INDEX_DTYPE)
+    index['seed'] = np.arange(1, n + 1)
+    index['ace_depth_max'] = (depth * aces).max(axis=(1, 2))
+    index['ace_depth_sum'] = (depth * aces).sum(axis=(1, 2))
+    index['low_card_depth'] = (depth * (valid & (rank < 2))).sum(axis=(1, 2))
+    index['king_depth_sum'] = (depth * kings).sum(axis=(1, 2))
+    index['kings_buried'] = kings_buried_cols.sum(axis=1)
+    index['kings_buried_max_column'] = kings_buried_cols.max(axis=1)
+    index['disorder'] = feats['out_of_order']
+    index['disorder_max_column'] = feats['out_of_order_columns'].max(axis=1)
+    index['suit_clusters'] = (pair_valid & (suit[:, :, :-1] == suit[:, :, 1:])).sum(axis=(1, 2))
+    index['score'] = evaluate.evaluate(layouts, freecells, foundations)
+    return index
+
+
+def save_index(index, path=SEED_INDEX_FILE):
+    tables.save_array(index, path)
+
+
+def seed_index():
+    global _index
+    if _index is None:
+        _index = tables.load_or_build(SEED_INDEX_FILE, build_index)
+    return _index
+
+
+def preload():
+    seed_index()
+
+
+# ---------------- Queries ----------------
+
+_CLAUSE = re.compile(r"^\s*([a-z_]+)\s*(<=|>=|==|!=|<|>|=)\s*(-?\d+(?:\.\d+)?)(?:\.\.(-?\d+(?:\.\d+)?))?\s*$")
+_OPS = {
+    '<=': np.less_equal, '>=': np.greater_equal, '<': np.less, '>': np.greater,
+    '==': np.equal, '=': np.equal, '!=': np.not_equal,
+}
+
+
+def parse_query(query):
+    """Parse 'field op value, ...' into (field, op, low, high) clauses; raises ValueError."""
+    clauses = []
+    for part in (query or "").split(','):
+        if not part.strip():
+            continue
+        match = _CLAUSE.match(part)
+        if not match:
+            raise ValueError(f"Invalid clause: {part.strip()!r}")
+        field, op, low, high = match.groups()
+        if field not in FIELDS:
+            raise ValueError(f"Unknown field: {field!r}")
+        if high is not None and op != '=':
+            raise ValueError(f"Ranges use '=': {part.strip()!r}")
+        clauses.append((field, op, float(low), None if high is None else float(high)))
+    return clauses
+
+
+def query_seeds(query, limit=100, offset=0):
+    index = seed_index()
+    mask = np.ones(len(index), dtype=bool)
+    for field, op, low, high in parse_query(query):
+        column = index[field]
+        if high is not None:
+            mask &= (column >= low) & (column <= high)
+        else:
+            mask &= _OPS[op](column, low)
+    seeds = index['seed'][mask]
+    return {
+        'count': int(len(seeds)),
+        'seeds': seeds[offset:offset + limit].tolist(),
+    }
+
+
+def seed_features(seed):
+    index = seed_index()
+    if not 1 <= seed <= len(index):
+        return None
+    row = index[seed - 1]
+    return {name: row[name].item() for name in FIELDS}
+
+
+if __name__ == '__main__':
+    save_index(build_index())
+    print(f"Wrote {SEED_INDEX_FILE}")
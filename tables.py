@@ -0,0 +1,77 @@
+# tables.py
+# Read-only lookup tables shared by every gunicorn worker.
+# The deal table is a (NUM_SEEDS, 52) uint8 array of card codes (see cards.DECK) in deal
+# order. It is saved to disk once and memory-mapped, so every process shares the same
+# page-cache pages; with preload it is also mapped in the master before workers fork.
+import os
+import random
+import numpy as np
+
+NUM_SEEDS = 32000
+DEAL_TABLE_FILE = os.environ.get("DEAL_TABLE_FILE", "deal_table.npy")
+
+_deal_table = None
+
+
+def build_deal_table():
+    table = np.empty((NUM_SEEDS, 52), dtype=np.uint8)
+    rng = random.Random()
+    order = list(range(52))
+    for seed in range(1, NUM_SEEDS + 1):
+        # Same permutation game_logic.deal_tableau gets from shuffling a fresh deck
+        rng.seed(seed)
+        perm = order[:]
+        rng.shuffle(perm)
+        table[seed - 1] = perm
+    return table
+
+
+def save_array(array, path):
+    # Per-process temp name: workers building on the same miss must not share a file
+    tmp_path = f"{path}.{os.getpid()}.tmp"
+    with open(tmp_path, "wb") as f:
+        np.save(f, array)
+    os.replace(tmp_path, path)
+
+
+def load_or_build(path, build):
+    """Memory-map the .npy at path, building and saving it first if it doesn't exist."""
+    if not os.path.exists(path):
+        array = build()
+        try:
+            save_array(array, path)
+        except OSError:
+            return array  # Read-only filesystem: keep a private in-memory copy
+    return np.load(path, mmap_mode='r')
+
+
+def save_deal_table(table, path=DEAL_TABLE_FILE):
+    save_array(table, path)
+
+
+def deal_table():
+    global _deal_table
+    if _deal_table is None:
+        _deal_table = load_or_build(DEAL_TABLE_FILE, build_deal_table)
+    return _deal_table
+
+
+def deal_codes(seed):
+    """Card codes in deal order for a standard seed, or None if seed is outside the table."""
+    try:
+        seed = int(seed)
+    except (ValueError, TypeError):
+        return None
+    if not 1 <= seed <= NUM_SEEDS:
+        return None
+    return deal_table()[seed - 1]
+
+
+def preload():
+    # Build/map every shared table now (in the gunicorn master when preloading)
+    deal_table()
+
+
+if __name__ == '__main__':
+    save_deal_table(build_deal_table())
+    print(f"Wrote {DEAL_TABLE_FILE}")
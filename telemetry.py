@@ -0,0 +1,221 @@
+# telemetry.py
+# Gameplay analytics: compact typed records buffered in memory and flushed
+# in bulk to .npy files, plus an offline per-seed aggregator.
+import os
+import sys
+import time
+import atexit
+import threading
+import queue
+import numpy as np
+
+TELEMETRY_DIR = os.environ.get("TELEMETRY_DIR", "telemetry")
+TELEMETRY_ENABLED = os.environ.get("TELEMETRY", "1") != "0"
+BUFFER_SIZE = 65536  # records per flushed file
+# Also flush once the oldest buffered record is this old, so a quiet worker doesn't sit on
+# days of events that a kill or OOM would lose
+FLUSH_SECONDS = float(os.environ.get("TELEMETRY_FLUSH_SECONDS", "60"))
+
+EVENT_START = 0
+EVENT_MOVE = 1
+EVENT_UNDO = 2
+EVENT_CANCEL = 3
+EVENT_WIN = 4
+
+RECORD_DTYPE = np.dtype([
+    ('ts', '<f8'),          # unix time of the event
+    ('session', '<u8'),     # low 64 bits of the session uuid
+    ('seed', '<i4'),        # -1 when the game has no integer seed
+    ('event', 'u1'),
+    ('move_count', '<u2'),
+    ('runtime', '<f4'),     # seconds, NaN unless event is a win
+])
+
+
+def session_key(session_id):
+    try:
+        return int(session_id.replace('-', '')[-16:], 16)
+    except (AttributeError, ValueError):
+        return 0
+
+
+def seed_key(seed):
+    try:
+        return int(seed)
+    except (ValueError, TypeError):
+        return -1
+
+
+class Recorder:
+    """Appends records to a preallocated buffer; full or stale buffers are written by a background thread."""
+
+    def __init__(self, directory=TELEMETRY_DIR, buffer_size=BUFFER_SIZE, flush_seconds=FLUSH_SECONDS):
+        self.directory = directory
+        self.buffer_size = buffer_size
+        self.flush_seconds = flush_seconds
+        self._lock = threading.Lock()
+        self._buffer = np.zeros(buffer_size, dtype=RECORD_DTYPE)
+        self._count = 0
+        self._oldest = None  # ts of the first record in the buffer
+        self._file_index = 0
+        # Created with the writer thread, i.e. after any gunicorn fork / gevent patching
+        self._queue = None
+        self._writer = None
+
+    def record(self, event, session_id=None, seed=None, move_count=0, runtime=None):
+        row = (
+            time.time(),
+            session_key(session_id),
+            seed_key(seed),
+            event,
+            min(int(move_count or 0), 0xFFFF),
+            np.nan if runtime is None else runtime,
+        )
+        with self._lock:
+            if self._writer is None:
+                self._start_writer()
+            self._buffer[self._count] = row
+            self._count += 1
+            if self._count == 1:
+                self._oldest = row[0]
+            if self._count == self.buffer_size or row[0] - self._oldest >= self.flush_seconds:
+                self._hand_off()
+
+    def flush(self):
+        with self._lock:
+            if self._count:
+                self._hand_off()
+        if self._writer is not None:
+            self._queue.join()
+
+    def _hand_off(self):
+        # Called with the lock held: swap in a fresh buffer, write the old one off-thread
+        full = self._buffer[:self._count]
+        self._buffer = np.zeros(self.buffer_size, dtype=RECORD_DTYPE)
+        self._count = 0
+        self._oldest = None
+        if self._writer is None:
+            self._start_writer()
+        self._queue.put(full)
+
+    def _start_writer(self):
+        self._queue = queue.Queue()
+        self._writer = threading.Thread(target=self._write_loop, daemon=True)
+        self._writer.start()
+
+    def _hand_off_if_stale(self):
+        with self._lock:
+            if self._count and time.time() - self._oldest >= self.flush_seconds:
+                self._hand_off()
+
+    def _write_loop(self):
+        while True:
+            try:
+                # Wake up regularly: with no new events, nothing else would flush the buffer
+                records = self._queue.get(timeout=self.flush_seconds / 2)
+            except queue.Empty:
+                self._hand_off_if_stale()
+                continue
+            try:
+                self._write(records)
+            finally:
+                self._queue.task_done()
+
+    def _write(self, records):
+        os.makedirs(self.directory, exist_ok=True)
+        self._file_index += 1
+        name = f"events-{os.getpid()}-{int(time.time() * 1000)}-{self._file_index}.npy"
+        tmp_path = os.path.join(self.directory, name + ".tmp")
+        with open(tmp_path, "wb") as f:
+            np.save(f, records)
+        os.replace(tmp_path, os.path.join(self.directory, name))
+
+
+_recorder = Recorder() if TELEMETRY_ENABLED else None
+if _recorder is not None:
+    atexit.register(_recorder.flush)
+
+
+def record(event, session_id=None, seed=None, move_count=0, runtime=None):
+    if _recorder is not None:
+        _recorder.record(event, session_id, seed, move_count, runtime)
+
+
+def flush():
+    if _recorder is not None:
+        _recorder.flush()
+
+
+# ---------------- Offline aggregation ----------------
+
+def load_events(directory=TELEMETRY_DIR):
+    paths = sorted(
+        os.path.join(directory, name) for name in os.listdir(directory)
+        if name.endswith(".npy")
+    )
+    if not paths:
+        return np.zeros(0, dtype=RECORD_DTYPE)
+    return np.concatenate([np.load(p, mmap_mode='r') for p in paths])
+
+
+def _group_median(groups, values, n_groups):
+    # Median of values within each group id (0..n_groups-1); NaN for empty groups
+    keep = ~np.isnan(values)
+    groups, values = groups[keep], values[keep]
+    order = np.lexsort((values, groups))
+    groups, values = groups[order], values[order]
+    counts = np.bincount(groups, minlength=n_groups)
+    starts = np.concatenate(([0], np.cumsum(counts)[:-1]))
+    result = np.full(n_groups, np.nan)
+    has = counts > 0
+    lo = starts[has] + (counts[has] - 1) // 2
+    hi = starts[has] + counts[has] // 2
+    result[has] = (values[lo] + values[hi]) / 2.0
+    return result
+
+
+def aggregate(events):
+    """Per-seed win rate, median moves/runtime of wins, and undo frequency."""
+    seeds, group = np.unique(events['seed'], return_inverse=True)
+    n = len(seeds)
+    event = events['event']
+
+    def per_seed(kind):
+        return np.bincount(group[event == kind], minlength=n)
+
+    games = per_seed(EVENT_START)
+    wins = per_seed(EVENT_WIN)
+    moves = per_seed(EVENT_MOVE)
+    undos = per_seed(EVENT_UNDO)
+
+    won = event == EVENT_WIN
+    won_group = group[won]
+    median_moves = _group_median(won_group, events['move_count'][won].astype(np.float64), n)
+    median_runtime = _group_median(won_group, events['runtime'][won].astype(np.float64), n)
+
+    with np.errstate(divide='ignore', invalid='ignore'):
+        win_rate = np.where(games > 0, wins / games, np.nan)
+        undo_rate = np.where(moves > 0, undos / moves, np.nan)
+
+    return {
+        'seed': seeds,
+        'games': games,
+        'wins': wins,
+        'win_rate': win_rate,
+        'median_moves': median_moves,
+        'median_runtime': median_runtime,
+        'undos': undos,
+        'undo_rate': undo_rate,
+    }
+
+
+def print_summary(stats, out=sys.stdout):
+    columns = list(stats.keys())
+    out.write(",".join(columns) + "\n")
+    for i in range(len(stats['seed'])):
+        out.write(",".join(str(stats[c][i]) for c in columns) + "\n")
+
+
+if __name__ == '__main__':
+    directory = sys.argv[1] if len(sys.argv) > 1 else TELEMETRY_DIR
+    print_summary(aggregate(load_events(directory)))
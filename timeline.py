@@ -0,0 +1,87 @@
+# timeline.py
+# Move history for undo/redo/seek: the list of moves played plus a compact board
+# checkpoint every CHECKPOINT_INTERVAL moves. Any point in the game is rebuilt from the
+# nearest earlier checkpoint by replaying at most CHECKPOINT_INTERVAL - 1 moves.
+import cards, game_logic, utils
+
+CHECKPOINT_INTERVAL = 16
+EMPTY_FREECELL = 255
+SUIT_OFFSETS = {suit: i * len(cards.RANKS) for i, suit in enumerate(cards.SUITS)}
+
+
+def encode_board(state):
+    # Card codes as bytes: a checkpoint is ~70 bytes instead of 52 deep-copied Card objects
+    return (
+        tuple(bytes(cards.card_code(c) for c in col) for col in state['tableau']),
+        bytes(EMPTY_FREECELL if c is None else cards.card_code(c) for c in state['freecells']),
+        tuple(len(state['foundations'][suit]) for suit in cards.SUITS),
+    )
+
+
+def decode_board(board):
+    tableau, freecells, foundation_sizes = board
+    return {
+        'tableau': [[cards.DECK[code] for code in col] for col in tableau],
+        'freecells': [None if code == EMPTY_FREECELL else cards.DECK[code] for code in freecells],
+        'foundations': {
+            suit: [cards.DECK[SUIT_OFFSETS[suit] + i] for i in range(size)]
+            for suit, size in zip(cards.SUITS, foundation_sizes)
+        },
+    }
+
+
+def apply_move(state, move):
+    num, source, dest = move
+    source_type, source_idx = utils.parse_location(source)
+    dest_type, dest_idx = utils.parse_location(dest)
+    return game_logic.dispatch_move(state, num, source_type, source_idx, dest_type, dest_idx)
+
+
+class Timeline:
+    def __init__(self, state, interval=CHECKPOINT_INTERVAL):
+        self.interval = interval
+        self.moves = []                          # every move recorded, including undone ones
+        self.position = 0                        # number of moves currently applied
+        self.checkpoints = [encode_board(state)]  # checkpoints[i] is the board after i * interval moves
+
+    @property
+    def length(self):
+        return len(self.moves)
+
+    def played_moves(self):
+        return self.moves[:self.position]
+
+    def record(self, move, state):
+        """Record a move just applied to state; discards anything that could have been redone."""
+        if self.position < len(self.moves):
+            del self.moves[self.position:]
+            del self.checkpoints[self.position // self.interval + 1:]
+        self.moves.append(move)
+        self.position += 1
+        if self.position % self.interval == 0:
+            self.checkpoints.append(encode_board(state))
+
+    def redo(self, state):
+        if self.position >= len(self.moves):
+            return False, "No moves to redo"
+        success, reason = apply_move(state, self.moves[self.position])
+        if not success:
+            return False, reason
+        self.position += 1
+        return True, ""
+
+    def seek(self, state, k):
+        """Restore state's board to how it was after k moves."""
+        if not 0 <= k <= len(self.moves):
+            return False, f"Move must be between 0 and {len(self.moves)}"
+        if self.position <= k < self.position + self.interval:
+            start = self.position  # Close ahead of us: just replay forward
+        else:
+            start = min(k // self.interval, len(self.checkpoints) - 1) * self.interval
+            state.update(decode_board(self.checkpoints[start // self.interval]))
+        for move in self.moves[start:k]:
+            success, reason = apply_move(state, move)
+            if not success:
+                return False, reason
+        self.position = k
+        return True, ""
@@ -1,5 +1,6 @@
 from cards import *
 import copy
+import sys
 
 def parse_location(loc):
     loc = loc.lower()
@@ -28,4 +29,27 @@ def deep_copy_state(tableau, freecells, foundations):
         copy.deepcopy(tableau),
         copy.deepcopy(freecells),
         copy.deepcopy(foundations)
-    )
\ No newline at end of file
+    )
+
+# ---------------- Batch CLI helpers ----------------
+
+def read_lines(paths):
+    """Non-blank lines of each file in turn ('-' is stdin), e.g. NDJSON records."""
+    for path in paths:
+        f = sys.stdin if path == '-' else open(path)
+        try:
+            for line in f:
+                if line.strip():
+                    yield line
+        finally:
+            if f is not sys.stdin:
+                f.close()
+
+def pool_map(func, items, workers=None, ordered=True, chunksize=1):
+    """func over items in a process pool (workers=None: one per CPU), yielding results."""
+    from multiprocessing import Pool
+    import tables
+    tables.preload()  # map the deal table once, before the pool forks
+    with Pool(workers) as pool:
+        mapper = pool.imap if ordered else pool.imap_unordered
+        yield from mapper(func, items, chunksize=chunksize)